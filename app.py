@@ -22,7 +22,8 @@ from models.mri_recommender import MRIRecommender
 
 from utility.utils.image_processor import ImageProcessor
 from utility.utils.text_processor import TextProcessor
-from utility.utils.data.database.models import DatabaseManager
+from utility.utils.result_cache import ResultCache
+from utility.utils.data.database.models import CompactInMemoryBackend, DatabaseManager, SQLiteBackend
 
 
 from translations import translations
@@ -86,7 +87,8 @@ def load_tumor_detector():
 @st.cache_resource
 def load_medical_nlp():
     try:
-        return MedicalNLP()
+        # Only doc.ents is used; reuse a serialized pipeline when configured
+        return MedicalNLP(lazy=True, trimmed=True, bundle_path=os.environ.get("BRAINWISE_NLP_BUNDLE"))
     except Exception as e:
         st.error(f"Error loading MedicalNLP: {str(e)}")
         return None
@@ -115,11 +117,28 @@ def load_text_processor():
         st.error(f"Error loading TextProcessor: {str(e)}")
         return None
 
+@st.cache_resource
+def load_result_cache():
+    try:
+        cache_path = os.environ.get("BRAINWISE_CACHE_PATH", os.path.join(".cache", "results.sqlite"))
+        return ResultCache(db_path=cache_path)
+    except Exception as e:
+        st.error(f"Error loading ResultCache: {str(e)}")
+        return ResultCache()
+
 @st.cache_resource
 def init_database():
     """Initialize database connection"""
     try:
-        db = DatabaseManager()
+        # Persist to SQLite when a path is configured, otherwise keep records in memory
+        db_path = os.environ.get("BRAINWISE_DB_PATH")
+        if db_path:
+            # Shared by every session: queue saves and let one thread batch them into SQLite
+            db = DatabaseManager(SQLiteBackend(db_path), write_behind=True)
+        elif os.environ.get("BRAINWISE_DB_COMPACT"):
+            db = DatabaseManager(CompactInMemoryBackend())
+        else:
+            db = DatabaseManager()
         db.create_tables()
         return db
     except Exception as e:
@@ -683,8 +702,16 @@ def comprehensive_analysis(tumor_detector, medical_nlp, mri_recommender, image_p
                 
                 if st.button("Analyze Image", key="analyze_image_comp"):
                     with st.spinner("Analyzing brain scan..."):
-                        processed_image = image_processor.preprocess_image(image)
-                        st.session_state.image_results = tumor_detector.predict(processed_image)
+                        # Identical uploads reuse the stored prediction
+                        result_cache = load_result_cache()
+                        cache_key = result_cache.make_key(
+                            uploaded_file.getvalue(), **image_processor.preprocessing_params()
+                        )
+                        st.session_state.image_results = result_cache.get_or_compute(
+                            cache_key,
+                            lambda: tumor_detector.predict(image_processor.preprocess_image(image)),
+                            cache_if=lambda result: 'error' not in result
+                        )
                     st.success("Image analysis complete!")
                     st.rerun()
             except Exception as e:
@@ -969,9 +996,25 @@ def database_dashboard(db):
         with col4:
             st.metric("Urgent Cases", stats['urgent_recommendations'])
         
-        # Recent analyses
+        # Recent analyses, paged newest first by record id
         st.subheader("Recent Patient Records")
-        recent_records = db.get_recent_analyses(10)
+        if 'dashboard_cursors' not in st.session_state:
+            st.session_state.dashboard_cursors = [None]
+        
+        cursors = st.session_state.dashboard_cursors
+        recent_records, next_cursor = db.get_analyses_page(after_id=cursors[-1], limit=10)
+        
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("← Newer", key="dashboard_newer", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+        with col2:
+            st.caption(f"Page {len(cursors)}")
+        with col3:
+            if st.button("Older →", key="dashboard_older", disabled=next_cursor is None):
+                cursors.append(next_cursor)
+                st.rerun()
         
         if recent_records:
             for record in recent_records:
@@ -0,0 +1,111 @@
+"""
+Benchmark: DatabaseManager on the in-memory and SQLite backends. Times
+per-record and batched inserts, the dashboard reads
+(get_analysis_statistics and get_recent_analyses) and paging through the
+whole patient history with get_analyses_page.
+
+Usage:
+    python benchmarks/bench_database.py [--records 100000] [--path bench.sqlite]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utility.utils.data.database.models import DatabaseManager, SQLiteBackend
+
+def save_patient(db, rng):
+    """Save one patient with an analysis and a recommendation"""
+    patient_id = db.save_patient_record({
+        'age': rng.randint(1, 90),
+        'gender': rng.choice(['Male', 'Female']),
+        'symptoms': 'persistent headache with nausea',
+        'severity': 'moderate',
+        'duration': '2 weeks'
+    })
+    analysis_id = db.save_medical_analysis({
+        'entities': {'SYMPTOM': ['headache', 'nausea']},
+        'symptom_count': 2,
+        'severity_indicators': 1,
+        'duration_present': True,
+        'processed_text': 'persistent headache with nausea'
+    }, patient_id)
+    db.save_mri_recommendation({
+        'recommendation_score': rng.random(),
+        'recommendation_text': 'MRI recommended',
+        'urgency_level': 'Moderate',
+        'reasons': ['headache'],
+        'urgent_indicators': [],
+        'red_flags_detected': False
+    }, analysis_id)
+
+def time_dashboard(db, repeats=20):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        db.get_analysis_statistics()
+        db.get_recent_analyses(10)
+    return (time.perf_counter() - start) * 1000 / repeats
+
+def time_paging(db, limit=50):
+    """Average ms per page walking every patient, newest first"""
+    pages, cursor = 0, None
+    start = time.perf_counter()
+    while True:
+        _, cursor = db.get_analyses_page(after_id=cursor, limit=limit)
+        pages += 1
+        if cursor is None:
+            break
+    return (time.perf_counter() - start) * 1000 / pages
+
+def time_sorted_recent(db, repeats=20):
+    """Reference: the original full sort by created_at per call"""
+    patients = db.patients
+    start = time.perf_counter()
+    for _ in range(repeats):
+        sorted(patients, key=lambda x: x.created_at, reverse=True)[:10]
+    return (time.perf_counter() - start) * 1000 / repeats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=100000, help="Patients to save (3 rows each)")
+    parser.add_argument('--path', help="SQLite file (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.path or os.path.join(tempfile.mkdtemp(), 'bench.sqlite')
+    rng = random.Random(0)
+
+    memory_db = DatabaseManager()
+    start = time.perf_counter()
+    for _ in range(args.records):
+        save_patient(memory_db, rng)
+    print(f"in-memory inserts          {args.records / (time.perf_counter() - start):9.0f} patients/s")
+
+    sqlite_db = DatabaseManager(SQLiteBackend(path))
+    single = min(args.records, 2000)
+    start = time.perf_counter()
+    for _ in range(single):
+        save_patient(sqlite_db, rng)
+    print(f"SQLite per-record inserts  {single / (time.perf_counter() - start):9.0f} patients/s")
+
+    start = time.perf_counter()
+    remaining = args.records - single
+    for offset in range(0, remaining, 5000):
+        with sqlite_db.batch():
+            for _ in range(min(5000, remaining - offset)):
+                save_patient(sqlite_db, rng)
+    print(f"SQLite batched inserts     {remaining / (time.perf_counter() - start):9.0f} patients/s")
+
+    print(f"dashboard reads, in-memory {time_dashboard(memory_db):9.2f} ms")
+    print(f"dashboard reads, SQLite    {time_dashboard(sqlite_db):9.2f} ms")
+    print(f"full sort per recent read  {time_sorted_recent(memory_db):9.2f} ms")
+    print(f"page of 50, in-memory      {time_paging(memory_db):9.3f} ms")
+    print(f"page of 50, SQLite         {time_paging(sqlite_db):9.3f} ms")
+    sqlite_db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: the medical_entities lookup helpers backed by MedicalLexicon
+versus the original per-variation loops, on clinical_summaries_5000.csv
+and on repeated symptom phrases, one helper at a time.
+
+Usage:
+    python benchmarks/bench_medical_lexicon.py
+"""
+import csv
+import os
+import random
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add project root to Python path
+sys.path.append(PROJECT_ROOT)
+
+from utility.utils.data import medical_entities
+from utility.utils.data.medical_entities import (
+    MEDICAL_SYMPTOMS, SEVERITY_INDICATORS, DURATION_INDICATORS,
+    RED_FLAG_SYMPTOMS, SYMPTOM_URGENCY_SCORES, MedicalLexicon
+)
+
+def first_category(table, text, default):
+    """Reference implementation: first entry with a variation in text"""
+    text_lower = text.lower()
+    for name, variations in table.items():
+        if any(variation in text_lower for variation in variations):
+            return name
+    return default
+
+def original_urgency_score(text):
+    """Reference implementation of get_urgency_score"""
+    text_lower = text.lower()
+    for symptom, score in SYMPTOM_URGENCY_SCORES.items():
+        if symptom in text_lower:
+            return score
+    return SYMPTOM_URGENCY_SCORES.get(first_category(MEDICAL_SYMPTOMS, text, 'other'), 0.3)
+
+# Helper name -> (reference implementation, lexicon-backed helper)
+HELPERS = {
+    'get_symptom_category': (
+        lambda text: first_category(MEDICAL_SYMPTOMS, text, 'other'), medical_entities.get_symptom_category
+    ),
+    'get_severity_level': (
+        lambda text: first_category(SEVERITY_INDICATORS, text, 'unknown'), medical_entities.get_severity_level
+    ),
+    'get_duration_type': (
+        lambda text: first_category(DURATION_INDICATORS, text, 'unknown'), medical_entities.get_duration_type
+    ),
+    'check_red_flags': (
+        lambda text: [red_flag for red_flag in RED_FLAG_SYMPTOMS if red_flag.lower() in text.lower()],
+        medical_entities.check_red_flags
+    ),
+    'get_urgency_score': (original_urgency_score, medical_entities.get_urgency_score),
+}
+
+def time_calls(function, texts):
+    start = time.perf_counter()
+    results = [function(text) for text in texts]
+    return results, time.perf_counter() - start
+
+def load_summaries():
+    with open(os.path.join(PROJECT_ROOT, 'clinical_summaries_5000.csv'), newline='', encoding='utf-8') as csvfile:
+        return [row['ClinicalSummary'] for row in csv.DictReader(csvfile)]
+
+def main():
+    rng = random.Random(0)
+    summaries = load_summaries()
+    phrases = [variation for variations in MEDICAL_SYMPTOMS.values() for variation in variations]
+    symptom_texts = [rng.choice(phrases) for _ in range(20000)]
+
+    for name, texts in [('5000 clinical summaries', summaries), ('20000 symptom phrases', symptom_texts)]:
+        print(name)
+        for helper, (original, lexicon_helper) in HELPERS.items():
+            # Fresh lexicon so the memo starts cold
+            medical_entities._default_lexicon = MedicalLexicon()
+
+            expected, original_seconds = time_calls(original, texts)
+            actual, lexicon_seconds = time_calls(lexicon_helper, texts)
+            if actual != expected:
+                print(f"Mismatch in {helper} on {name}")
+                sys.exit(1)
+
+            print(f"  {helper:<22} original {original_seconds * 1000:7.1f} ms  "
+                  f"lexicon {lexicon_seconds * 1000:7.1f} ms  ({original_seconds / lexicon_seconds:.1f}x)")
+
+if __name__ == "__main__":
+    main()
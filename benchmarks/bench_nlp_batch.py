@@ -0,0 +1,52 @@
+"""
+Benchmark: per-note MedicalNLP.extract_entities versus extract_entities_batch
+on clinical_summaries_5000.csv.
+
+Usage:
+    python benchmarks/bench_nlp_batch.py [--batch-size 256] [--n-process 1]
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add project root to Python path
+sys.path.append(PROJECT_ROOT)
+
+from models.medical_nlp import MedicalNLP
+
+def load_summaries():
+    with open(os.path.join(PROJECT_ROOT, 'clinical_summaries_5000.csv'), newline='', encoding='utf-8') as csvfile:
+        return [row['ClinicalSummary'] for row in csv.DictReader(csvfile)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--n-process', type=int, default=1)
+    args = parser.parse_args()
+
+    medical_nlp = MedicalNLP()
+    summaries = load_summaries()
+    pipe_names = medical_nlp.nlp.pipe_names if medical_nlp.nlp is not None else []
+    print(f"Pipeline: {pipe_names}; disabled for batch: {medical_nlp.unused_entity_components()}")
+
+    start = time.perf_counter()
+    per_note = [medical_nlp.extract_entities(text) for text in summaries]
+    per_note_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = medical_nlp.extract_entities_batch(
+        summaries, batch_size=args.batch_size, n_process=args.n_process
+    )
+    batch_seconds = time.perf_counter() - start
+
+    mismatches = sum(a != b for a, b in zip(per_note, batched))
+    print(f"Mismatching notes: {mismatches} of {len(summaries)}")
+    print(f"extract_entities loop   {per_note_seconds:7.2f}s")
+    print(f"extract_entities_batch  {batch_seconds:7.2f}s  ({per_note_seconds / batch_seconds:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Parity check and startup benchmark for MedicalNLP's loading modes
+
+Builds the spaCy pipeline the original way (full model, entity ruler ahead
+of the NER, no ruler on the blank fallback), then checks that the eager,
+lazy, trimmed and bundled modes extract the same entities on
+clinical_summaries_5000.csv, including after a corrupt bundle is rebuilt.
+
+Usage:
+    python benchmarks/bench_nlp_loading.py [--notes 500]
+"""
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import spacy
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add project root to Python path
+sys.path.append(PROJECT_ROOT)
+
+from models.medical_nlp import MedicalNLP
+
+def original_pipeline(reference):
+    """Reference implementation: the pipeline as built before lazy/trimmed/bundled loading"""
+    try:
+        try:
+            nlp = spacy.load("en_core_sci_sm")
+        except OSError:
+            try:
+                nlp = spacy.load("en_core_web_sm")
+            except OSError:
+                nlp = spacy.blank("en")
+                nlp.add_pipe("sentencizer")
+        if "ner" in nlp.pipe_names:
+            reference.add_custom_patterns(nlp)
+        return nlp
+    except Exception:
+        return None
+
+def load_summaries(count):
+    with open(os.path.join(PROJECT_ROOT, 'clinical_summaries_5000.csv'), newline='', encoding='utf-8') as csvfile:
+        return [row['ClinicalSummary'] for row in csv.DictReader(csvfile)][:count]
+
+def timed(build):
+    start = time.perf_counter()
+    medical_nlp = build()
+    # Lazy mode loads here
+    medical_nlp.nlp
+    return medical_nlp, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--notes', type=int, default=500)
+    args = parser.parse_args()
+
+    summaries = load_summaries(args.notes)
+    bundle_path = os.path.join(tempfile.mkdtemp(), 'bundle')
+
+    reference = MedicalNLP.__new__(MedicalNLP)
+    reference.trimmed = False
+    reference.setup_medical_patterns()
+    reference.nlp = original_pipeline(reference)
+    expected = [reference.extract_entities(text) for text in summaries]
+
+    def corrupt_bundle():
+        shutil.rmtree(bundle_path, ignore_errors=True)
+        os.makedirs(bundle_path)
+        with open(os.path.join(bundle_path, 'config.cfg'), 'w') as config_file:
+            config_file.write('not a config')
+        return MedicalNLP(bundle_path=bundle_path)
+
+    modes = [
+        ('eager', lambda: MedicalNLP()),
+        ('lazy', lambda: MedicalNLP(lazy=True)),
+        ('trimmed', lambda: MedicalNLP(trimmed=True)),
+        ('bundle, first build', lambda: MedicalNLP(bundle_path=bundle_path)),
+        ('bundle, reload', lambda: MedicalNLP(bundle_path=bundle_path)),
+        ('bundle, corrupt', corrupt_bundle),
+        ('bundle, after rebuild', lambda: MedicalNLP(bundle_path=bundle_path)),
+    ]
+
+    failed = False
+    print(f"Reference pipeline: {reference.nlp.pipe_names if reference.nlp is not None else None}")
+    for name, build in modes:
+        medical_nlp, seconds = timed(build)
+        actual = [medical_nlp.extract_entities(text) for text in summaries]
+        mismatches = sum(a != b for a, b in zip(actual, expected))
+        failed = failed or mismatches > 0
+        pipe_names = medical_nlp.nlp.pipe_names if medical_nlp.nlp is not None else None
+        print(f"{name:<22} startup {seconds * 1000:8.1f} ms  {mismatches} of {len(summaries)} notes differ  {pipe_names}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: memory per stored record in the in-memory database. Compares the
+original __dict__ record classes, the __slots__ records with interned labels
+(InMemoryBackend) and packed tuples with JSON-encoded nested fields
+(CompactInMemoryBackend), measured with tracemalloc.
+
+Usage:
+    python benchmarks/bench_record_memory.py [--records 1000000]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utility.utils.data.database.models import CompactInMemoryBackend, DatabaseManager, InMemoryBackend
+
+class DictBackend(InMemoryBackend):
+    """Reference: stores copies of the records as the original __dict__ classes"""
+    def insert(self, table, records, statistics=None):
+        super().insert(table, [DictRecord(record) for record in records])
+
+class DictRecord:
+    """Reference: a record with a per-instance __dict__ and uninterned strings"""
+    def __init__(self, record):
+        for name in type(record).__slots__:
+            value = getattr(record, name)
+            # Strings built per request (e.g. parsed from a form) are not shared
+            setattr(self, name, ''.join(value) if isinstance(value, str) else value)
+
+def fresh(rng, choices):
+    """A new string object per call, as values parsed from a form or a note would be"""
+    return ''.join(rng.choice(choices))
+
+def save_patient(db, rng):
+    """Save one patient with an analysis and a recommendation"""
+    patient_id = db.save_patient_record({
+        'age': rng.randint(1, 90),
+        'gender': fresh(rng, ['Male', 'Female']),
+        'symptoms': fresh(rng, ['persistent headache with nausea', 'blurred vision', 'seizure']),
+        'severity': fresh(rng, ['mild', 'moderate', 'severe']),
+        'duration': fresh(rng, ['2 weeks', '3 days', '1 month'])
+    })
+    analysis_id = db.save_medical_analysis({
+        'entities': {'SYMPTOM': ['headache', 'nausea'], 'SEVERITY': ['moderate'], 'DURATION': ['2 weeks']},
+        'symptom_count': 2,
+        'severity_indicators': 1,
+        'duration_present': True,
+        'processed_text': 'persistent headache with nausea'
+    }, patient_id)
+    db.save_mri_recommendation({
+        'recommendation_score': rng.random(),
+        'recommendation_text': 'MRI recommended',
+        'urgency_level': fresh(rng, ['Low', 'Moderate', 'High']),
+        'reasons': ['headache', 'nausea'],
+        'urgent_indicators': [],
+        'red_flags_detected': False
+    }, analysis_id)
+
+def measure(backend, records):
+    """Bytes held per saved patient (three rows each), and seconds taken"""
+    gc.collect()
+    tracemalloc.start()
+    db = DatabaseManager(backend)
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(records):
+        save_patient(db, rng)
+    seconds = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / records, seconds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=1000000, help="Patients to save (3 rows each)")
+    args = parser.parse_args()
+
+    print(f"{args.records} patients, each with an analysis and a recommendation")
+    print(f"{'storage':<28} {'bytes/patient':>14} {'bytes/row':>10} {'seconds':>8}")
+    for name, backend_class in [
+        ('__dict__ records', DictBackend),
+        ('__slots__ + interned', InMemoryBackend),
+        ('compact packed tuples', CompactInMemoryBackend),
+    ]:
+        per_patient, seconds = measure(backend_class(), args.records)
+        print(f"{name:<28} {per_patient:14.0f} {per_patient / 3:10.0f} {seconds:8.1f}")
+
+if __name__ == "__main__":
+    main()
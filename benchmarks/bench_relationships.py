@@ -0,0 +1,87 @@
+"""
+Benchmark: MedicalNLP.analyze_relationships with bisect lookups versus the
+original linear find_closest_entity scan, on synthetic notes with hundreds of
+entities.
+
+Usage:
+    python benchmarks/bench_relationships.py
+"""
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.medical_nlp import MedicalNLP
+
+def analyze_relationships_linear(nlp, entities, text):
+    """Reference implementation: linear scan per symptom"""
+    relationships = []
+    entity_groups = defaultdict(list)
+    for entity in entities:
+        entity_groups[entity['label']].append(entity)
+
+    symptoms = entity_groups.get('SYMPTOM', []) + entity_groups.get('SYMPTOMS', [])
+    durations = entity_groups.get('DURATION', [])
+    severities = entity_groups.get('SEVERITY', [])
+
+    for symptom in symptoms:
+        closest_duration = nlp.find_closest_entity(symptom, durations, text)
+        if closest_duration:
+            relationships.append({
+                'type': 'symptom_duration',
+                'entities': [symptom, closest_duration],
+                'confidence': min(symptom['confidence'], closest_duration['confidence'])
+            })
+        closest_severity = nlp.find_closest_entity(symptom, severities, text)
+        if closest_severity:
+            relationships.append({
+                'type': 'symptom_severity',
+                'entities': [symptom, closest_severity],
+                'confidence': min(symptom['confidence'], closest_severity['confidence'])
+            })
+
+    return relationships
+
+def synthetic_entities(count, rng):
+    """Random entities spread over a note roughly 20 characters apart"""
+    labels = ['SYMPTOM', 'SYMPTOMS', 'DURATION', 'SEVERITY']
+    entities = []
+    for _ in range(count):
+        start = rng.randint(0, count * 20)
+        entities.append({
+            'text': 'x',
+            'label': rng.choice(labels),
+            'start': start,
+            'end': start + rng.randint(3, 15),
+            'confidence': rng.choice([0.6, 0.8])
+        })
+    return entities
+
+def main():
+    nlp = MedicalNLP.__new__(MedicalNLP)
+    rng = random.Random(0)
+
+    print(f"{'entities':>9} {'linear (ms)':>12} {'bisect (ms)':>12} {'speedup':>8}")
+    for count in [50, 200, 800, 3200]:
+        notes = [synthetic_entities(count, rng) for _ in range(5)]
+
+        start = time.perf_counter()
+        expected = [analyze_relationships_linear(nlp, entities, '') for entities in notes]
+        linear_ms = (time.perf_counter() - start) * 1000 / len(notes)
+
+        start = time.perf_counter()
+        actual = [nlp.analyze_relationships(entities, '') for entities in notes]
+        bisect_ms = (time.perf_counter() - start) * 1000 / len(notes)
+
+        if actual != expected:
+            print(f"Mismatch at {count} entities")
+            sys.exit(1)
+
+        print(f"{count:9d} {linear_ms:12.2f} {bisect_ms:12.2f} {linear_ms / bisect_ms:7.1f}x")
+
+if __name__ == "__main__":
+    main()
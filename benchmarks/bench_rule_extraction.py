@@ -0,0 +1,81 @@
+"""
+Parity check and throughput benchmark for MedicalNLP.extract_with_rules
+
+Compares the single-pass compiled scanner with the original loop of one
+re.finditer call per pattern on clinical_summaries_5000.csv.
+
+Usage:
+    python benchmarks/bench_rule_extraction.py
+"""
+import csv
+import os
+import re
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add project root to Python path
+sys.path.append(PROJECT_ROOT)
+
+from models.medical_nlp import MedicalNLP
+
+def extract_with_rules_per_pattern(medical_patterns, text):
+    """Reference implementation: one re.finditer scan per pattern"""
+    entities = []
+    text_lower = text.lower()
+
+    for category, patterns in medical_patterns.items():
+        for pattern in patterns:
+            for match in re.finditer(pattern, text_lower, re.IGNORECASE):
+                entities.append({
+                    'text': text[match.start():match.end()],
+                    'label': category.upper(),
+                    'start': match.start(),
+                    'end': match.end(),
+                    'confidence': 0.6,
+                    'source': 'rules'
+                })
+
+    return entities
+
+def load_summaries():
+    with open(os.path.join(PROJECT_ROOT, 'clinical_summaries_5000.csv'), newline='', encoding='utf-8') as csvfile:
+        return [row['ClinicalSummary'] for row in csv.DictReader(csvfile)]
+
+def main():
+    # The rule path does not need a spaCy pipeline
+    nlp = MedicalNLP.__new__(MedicalNLP)
+    nlp.setup_medical_patterns()
+
+    summaries = load_summaries()
+    long_note = ' '.join(summaries[:500])
+
+    mismatches = sum(
+        nlp.extract_with_rules(text) != extract_with_rules_per_pattern(nlp.medical_patterns, text)
+        for text in summaries + [long_note]
+    )
+    print(f"Parity: {mismatches} mismatching notes out of {len(summaries) + 1}")
+    if mismatches:
+        sys.exit(1)
+
+    for name, extract in [
+        ('per-pattern finditer', lambda text: extract_with_rules_per_pattern(nlp.medical_patterns, text)),
+        ('compiled single pass', nlp.extract_with_rules),
+    ]:
+        start = time.perf_counter()
+        for text in summaries:
+            extract(text)
+        csv_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        extract(long_note)
+        long_seconds = time.perf_counter() - start
+
+        print(
+            f"{name:<22} {len(summaries) / csv_seconds:10.0f} notes/s  "
+            f"{len(long_note) / long_seconds / 1e6:6.2f} MB/s on a {len(long_note) // 1024} KB note"
+        )
+
+if __name__ == "__main__":
+    main()
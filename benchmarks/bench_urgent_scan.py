@@ -0,0 +1,108 @@
+"""
+Benchmark: MRIRecommender.check_urgent_indicators with the precompiled,
+linear-time severe pain pattern versus the original four backtracking
+regexes, on 50 KB notes.
+
+Usage:
+    python benchmarks/bench_urgent_scan.py
+"""
+import csv
+import os
+import re
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add project root to Python path
+sys.path.append(PROJECT_ROOT)
+
+from models.mri_recommender import MRIRecommender
+
+NOTE_SIZE = 50 * 1024
+
+def check_urgent_indicators_original(recommender, text, symptoms):
+    """Reference implementation: one substring check per keyword, regexes compiled per call"""
+    urgent_indicators = []
+    text_lower = text.lower()
+    all_text = text_lower + ' ' + ' '.join(symptoms)
+
+    for urgent_keyword in recommender.urgent_keywords:
+        if urgent_keyword in all_text:
+            urgent_indicators.append(f"Urgent indicator detected: {urgent_keyword}")
+
+    severe_pain_patterns = [
+        r'pain.*(?:9|10).*(?:out of|/)\s*10',
+        r'(?:9|10).*(?:out of|/)\s*10.*pain',
+        r'worst.*headache.*life',
+        r'never.*felt.*pain.*like'
+    ]
+
+    for pattern in severe_pain_patterns:
+        if re.search(pattern, text_lower):
+            urgent_indicators.append("Severe pain intensity reported")
+            break
+
+    return urgent_indicators
+
+def repeat_to_size(unit, size):
+    return (unit * (size // len(unit) + 1))[:size]
+
+def time_ms(check, note, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = check(note)
+    return result, (time.perf_counter() - start) * 1000 / repeats
+
+def load_summaries():
+    with open(os.path.join(PROJECT_ROOT, 'clinical_summaries_5000.csv'), newline='', encoding='utf-8') as csvfile:
+        return [row['ClinicalSummary'] for row in csv.DictReader(csvfile)]
+
+def main():
+    recommender = MRIRecommender()
+    summaries = load_summaries()
+
+    def original(note):
+        return check_urgent_indicators_original(recommender, note, [])
+
+    def scanner(note):
+        return recommender.check_urgent_indicators(note, [])
+
+    print(f"{'note':<30} {'size':>6} {'original (ms)':>14} {'scanner (ms)':>13}")
+
+    realistic = {
+        'clinical summaries': ' '.join(summaries),
+        'summaries, one per line': '\n'.join(summaries),
+    }
+    for name, text in realistic.items():
+        note = text[:NOTE_SIZE]
+        expected, original_ms = time_ms(original, note, 20)
+        actual, scanner_ms = time_ms(scanner, note, 20)
+        if actual != expected:
+            print(f"Mismatch on '{name}'")
+            sys.exit(1)
+        print(f"{name:<30} {len(note) // 1024:5d}K {original_ms:14.2f} {scanner_ms:13.2f}")
+
+    # Near misses that make the original .* patterns backtrack; these grow
+    # quadratically or worse, so the original only runs on a 4 KB prefix
+    pathological = {
+        'pain pain ... (no score)': 'pain ',
+        'pain 9 9 9 ... (no /10)': 'pain 9 9 9 9 9 9 9 9',
+        'worst headache ... (no life)': 'worst headache ',
+        '9 /10 /10 ... (no pain)': '9 /10 /10 /10 /10 ',
+    }
+    for name, unit in pathological.items():
+        small_note = repeat_to_size(unit, 4 * 1024)
+        expected, original_ms = time_ms(original, small_note, 1)
+        actual, scanner_ms = time_ms(scanner, small_note, 20)
+        if actual != expected:
+            print(f"Mismatch on '{name}'")
+            sys.exit(1)
+        print(f"{name:<30} {4:5d}K {original_ms:14.2f} {scanner_ms:13.2f}")
+
+        note = repeat_to_size(unit, NOTE_SIZE)
+        _, scanner_ms = time_ms(scanner, note, 20)
+        print(f"{'':<30} {NOTE_SIZE // 1024:5d}K {'(skipped)':>14} {scanner_ms:13.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Stress test: many threads saving to one shared DatabaseManager at once, as
+Streamlit sessions do through st.cache_resource. For each backend, with and
+without the write-behind queue, checks that every id is unique and
+contiguous, that every record was stored exactly once, that the statistics
+counters match a rebuild, and that paging walks the whole history. Then
+checks that SQLite counters rebuilt at startup survive a restart.
+
+Usage:
+    python benchmarks/stress_database_writes.py [--threads 32] [--saves 500]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utility.utils.data.database.models import (
+    CompactInMemoryBackend, DatabaseManager, InMemoryBackend, SQLiteBackend, StatisticsCounters
+)
+
+def save_patient(db, rng):
+    """Save one patient with an analysis, a recommendation and a tumor analysis"""
+    patient_id = db.save_patient_record({'age': rng.randint(1, 90), 'gender': rng.choice(['Male', 'Female'])})
+    analysis_id = db.save_medical_analysis({'entities': {'SYMPTOM': ['headache']}, 'symptom_count': 1}, patient_id)
+    db.save_mri_recommendation({'recommendation_score': rng.random(), 'reasons': ['headache']}, analysis_id)
+    db.save_tumor_analysis({'tumor_type': rng.choice(['glioma', 'meningioma', 'pituitary', None])})
+    return patient_id
+
+def hammer(db, threads, saves):
+    """Save from every thread at once; returns per-thread patient ids and seconds taken"""
+    start_gate = threading.Barrier(threads)
+    saved = [None] * threads
+
+    def worker(index):
+        rng = random.Random(index)
+        start_gate.wait()
+        ids = []
+        for i in range(saves):
+            if i % 50 == 0:
+                # Mix in batched saves and concurrent reads
+                with db.batch():
+                    ids.append(save_patient(db, rng))
+                db.get_recent_analyses(10)
+            else:
+                ids.append(save_patient(db, rng))
+        saved[index] = ids
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    db.flush()
+    return saved, time.perf_counter() - start
+
+def check(db, saved, threads, saves):
+    """List of problems found; empty when the store is consistent"""
+    problems = []
+    expected_rows = threads * saves
+
+    tables = [db.patients, db.analyses, db.recommendations, db.tumor_analyses]
+    all_ids = [record.id for records in tables for record in records]
+    if sorted(all_ids) != list(range(1, 4 * expected_rows + 1)):
+        problems.append(f"ids are not unique and contiguous ({len(all_ids)} rows, {len(set(all_ids))} distinct)")
+    for records in tables:
+        if len(records) != expected_rows:
+            problems.append(f"expected {expected_rows} rows in a table, found {len(records)}")
+
+    patient_ids = sorted(record.id for record in tables[0])
+    if sorted(i for ids in saved for i in ids) != patient_ids:
+        problems.append("saved patient ids differ from stored ones")
+
+    analysis_parents = sorted(record.patient_record_id for record in tables[1])
+    if analysis_parents != patient_ids:
+        problems.append("analyses do not reference their patients one to one")
+
+    differences = db.rebuild_statistics()
+    if differences:
+        problems.append(f"statistics drifted: {sorted(differences)}")
+
+    paged, cursor = [], None
+    while True:
+        records, cursor = db.get_analyses_page(after_id=cursor, limit=97)
+        paged.extend(record.id for record in records)
+        if cursor is None:
+            break
+    if paged != patient_ids[::-1]:
+        problems.append("paging did not walk every patient newest first")
+
+    return problems
+
+def check_restart(path):
+    """List of problems with counters rebuilt at startup, then saved to and reopened"""
+    rng = random.Random(0)
+    db = DatabaseManager(SQLiteBackend(path))
+    for _ in range(5):
+        db.save_patient_record({'age': rng.randint(1, 90)})
+    # A store written before counters were persisted
+    db.backend.save_statistics(StatisticsCounters())
+    db.close()
+
+    counts = []
+    for save in [True, False]:
+        db = DatabaseManager(SQLiteBackend(path))
+        counts.append(db.statistics.counts['patients'])
+        if save:
+            db.save_patient_record({'age': rng.randint(1, 90)})
+        db.close()
+
+    if counts != [5, 6]:
+        return [f"patient count at restart, save, restart was {counts}, expected [5, 6]"]
+    return []
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--saves', type=int, default=500, help="Patients saved per thread (4 rows each)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    configurations = [
+        ('in-memory', lambda: InMemoryBackend(), False),
+        ('compact in-memory', lambda: CompactInMemoryBackend(), False),
+        ('SQLite', lambda: SQLiteBackend(os.path.join(directory, 'direct.sqlite')), False),
+        ('SQLite + write-behind', lambda: SQLiteBackend(os.path.join(directory, 'queued.sqlite')), True),
+    ]
+
+    failed = False
+    print(f"{args.threads} threads x {args.saves} patients (4 rows each)")
+    for name, make_backend, write_behind in configurations:
+        db = DatabaseManager(make_backend(), write_behind=write_behind)
+        saved, seconds = hammer(db, args.threads, args.saves)
+        problems = check(db, saved, args.threads, args.saves)
+        db.close()
+
+        rows_per_second = 4 * args.threads * args.saves / seconds
+        print(f"{name:<24} {rows_per_second:9.0f} rows/s  {'ok' if not problems else 'FAILED'}")
+        for problem in problems:
+            print(f"    {problem}")
+        failed = failed or bool(problems)
+
+    problems = check_restart(os.path.join(directory, 'restart.sqlite'))
+    print(f"{'SQLite restart':<24} {'':>15}  {'ok' if not problems else 'FAILED'}")
+    for problem in problems:
+        print(f"    {problem}")
+    failed = failed or bool(problems)
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import bisect
 import re
 import spacy
 from spacy import displacy
@@ -5,50 +6,138 @@ import pandas as pd
 import numpy as np
 from collections import defaultdict
 import os
+import threading
+
+from utility.utils.abbreviations import get_abbreviation_index
 
 class MedicalNLP:
     """Medical Natural Language Processing for entity extraction"""
     
-    def __init__(self):
-        self.nlp = None
+    # Extractor priority when merging overlapping spans (higher wins)
+    SOURCE_PRIORITY = {'spacy': 1, 'rules': 0}
+    
+    # Components never read by the entity path, skipped in trimmed mode
+    TRIMMED_EXCLUDE = [
+        'parser', 'tagger', 'lemmatizer', 'attribute_ruler', 'senter',
+        'morphologizer', 'sentencizer'
+    ]
+    
+    def __init__(self, lazy=False, trimmed=False, bundle_path=None):
+        """
+        lazy: defer loading spaCy until the pipeline is first used
+        trimmed: load only the components that produce doc.ents
+        bundle_path: directory holding a serialized pipeline (custom ruler
+            included); it is loaded when present and written after the
+            first full build otherwise
+        """
+        self._nlp = None
+        self._nlp_loaded = False
+        self._nlp_lock = threading.Lock()
+        self.trimmed = trimmed
+        self.bundle_path = bundle_path
         self.medical_patterns = {}
-        self.initialize_nlp_model()
+        # Labels that name the same kind of entity for overlap resolution
+        self.label_families = {'SYMPTOMS': 'SYMPTOM'}
+        if not lazy:
+            self.initialize_nlp_model()
         self.setup_medical_patterns()
     
+    @property
+    def nlp(self):
+        """spaCy pipeline, loaded on first access in lazy mode"""
+        if not self._nlp_loaded:
+            with self._nlp_lock:
+                if not self._nlp_loaded:
+                    self.initialize_nlp_model()
+        return self._nlp
+    
+    @nlp.setter
+    def nlp(self, value):
+        self._nlp = value
+        self._nlp_loaded = True
+    
     def initialize_nlp_model(self):
         """Initialize spaCy NLP model"""
+        # Publish the pipeline only once it is fully configured, so lazy
+        # callers that skip the lock never see a half-built one
+        self.nlp = self.build_pipeline()
+    
+    def build_pipeline(self):
+        """Load and configure a spaCy pipeline, or None for the rule-based fallback"""
+        exclude = self.TRIMMED_EXCLUDE if self.trimmed else []
+        
+        # Start from a previously saved pipeline when available
+        if self.bundle_path and os.path.isdir(self.bundle_path):
+            try:
+                return spacy.load(self.bundle_path, exclude=exclude)
+            except Exception as e:
+                # Corrupt or partial bundle: rebuild from the base model and save it again
+                print(f"Warning: Could not load spaCy pipeline from {self.bundle_path}, rebuilding it: {e}")
+        
         try:
             # Try to load a medical-specific model first
             try:
-                self.nlp = spacy.load("en_core_sci_sm")  # ScispaCy medical model
+                nlp = spacy.load("en_core_sci_sm", exclude=exclude)  # ScispaCy medical model
             except OSError:
                 try:
-                    self.nlp = spacy.load("en_core_web_sm")  # Standard English model
+                    nlp = spacy.load("en_core_web_sm", exclude=exclude)  # Standard English model
                 except OSError:
                     # If no model is available, create a blank one
-                    self.nlp = spacy.blank("en")
+                    nlp = spacy.blank("en")
                     # Add basic components
-                    self.nlp.add_pipe("sentencizer")
+                    if not self.trimmed:
+                        nlp.add_pipe("sentencizer")
+            
+            if self.trimmed:
+                self.trim_pipeline(nlp)
             
             # Add custom medical entity recognition patterns
-            self.add_custom_patterns()
+            self.add_custom_patterns(nlp)
+            
+            if self.bundle_path:
+                self.save_pipeline(self.bundle_path, nlp)
+            
+            return nlp
             
         except Exception as e:
             # Fallback to rule-based approach
-            self.nlp = None
             print(f"Warning: Could not load spaCy model, using rule-based approach: {e}")
+            return None
+    
+    def trim_pipeline(self, nlp=None):
+        """Remove loaded components that do not contribute to doc.ents"""
+        nlp = nlp if nlp is not None else self.nlp
+        for name in self.unused_entity_components(nlp):
+            nlp.remove_pipe(name)
+    
+    def save_pipeline(self, path, nlp=None):
+        """Serialize the configured pipeline, custom patterns included"""
+        nlp = nlp if nlp is not None else self.nlp
+        if nlp is None:
+            return
+        
+        try:
+            nlp.to_disk(path)
+        except Exception as e:
+            print(f"Warning: Could not save spaCy pipeline to {path}: {e}")
     
-    def add_custom_patterns(self):
+    def add_custom_patterns(self, nlp=None):
         """Add custom patterns for medical entity recognition"""
-        if self.nlp is None:
+        nlp = nlp if nlp is not None else self.nlp
+        if nlp is None:
             return
         
         try:
             # Add EntityRuler for pattern-based entity recognition
-            if "entity_ruler" not in self.nlp.pipe_names:
-                ruler = self.nlp.add_pipe("entity_ruler", before="ner")
+            if "entity_ruler" not in nlp.pipe_names:
+                # The ruler runs ahead of the statistical NER. Without one (the
+                # blank fallback) no ruler is added, as before; extract_with_rules
+                # already covers these patterns there
+                if "ner" not in nlp.pipe_names:
+                    return
+                ruler = nlp.add_pipe("entity_ruler", before="ner")
             else:
-                ruler = self.nlp.get_pipe("entity_ruler")
+                ruler = nlp.get_pipe("entity_ruler")
             
             # Medical patterns
             patterns = [
@@ -144,9 +233,45 @@ class MedicalNLP:
                 r'\b(?:\d+)\s*times?\s*(?:per|a)\s*(?:day|week|month)\b'
             ]
         }
+        self.compile_medical_patterns()
     
-    def extract_entities(self, text):
-        """Extract medical entities from text"""
+    def compile_medical_patterns(self):
+        """Compile medical_patterns into a single-pass scanner
+        
+        The scanner visits each word boundary once and stops only where at
+        least one pattern matches; a second regex made of one optional
+        lookahead per pattern then reports every pattern matching at that
+        position in a single call. Call again after editing medical_patterns.
+        """
+        self.rule_labels = []
+        alternatives = []
+        lookaheads = []
+        
+        for category, patterns in self.medical_patterns.items():
+            for pattern in patterns:
+                index = len(self.rule_labels)
+                self.rule_labels.append(category.upper())
+                alternatives.append(f'(?:{pattern})')
+                lookaheads.append(f'(?:(?=(?P<p{index}>{pattern})))?')
+        
+        self.rule_scanner = re.compile('(?=' + '|'.join(alternatives) + ')', re.IGNORECASE)
+        self.rule_matcher = re.compile(''.join(lookaheads), re.IGNORECASE)
+    
+    def expand_abbreviations(self, text):
+        """Expand medical abbreviations with the shared abbreviation index
+        
+        Entity offsets refer to the text they were extracted from, so expand
+        before calling extract_entities when offsets should match the
+        expanded form.
+        """
+        return get_abbreviation_index().expand(text)
+    
+    def extract_entities(self, text, resolve_overlaps=False):
+        """Extract medical entities from text
+        
+        With resolve_overlaps=True, overlapping spans of the same kind are
+        merged (see resolve_overlapping_entities) before deduplication.
+        """
         entities = []
         
         if self.nlp is not None:
@@ -156,46 +281,124 @@ class MedicalNLP:
         # Add rule-based extraction as backup/supplement
         entities.extend(self.extract_with_rules(text))
         
+        if resolve_overlaps:
+            entities = self.resolve_overlapping_entities(entities)
+        
         # Remove duplicates and return
         return self.deduplicate_entities(entities)
     
+    def extract_entities_batch(self, texts, batch_size=64, n_process=1, resolve_overlaps=False):
+        """Extract medical entities from many texts at once
+        
+        Runs spaCy through nlp.pipe with only the components that feed
+        doc.ents enabled, then merges the rule-based entities per document.
+        Returns one entity list per input text, in order.
+        """
+        texts = list(texts)
+        spacy_entities = [[] for _ in texts]
+        
+        if self.nlp is not None:
+            try:
+                docs = self.nlp.pipe(
+                    texts,
+                    batch_size=batch_size,
+                    n_process=n_process,
+                    disable=self.unused_entity_components()
+                )
+                for index, doc in enumerate(docs):
+                    spacy_entities[index] = self.entities_from_doc(doc)
+            except Exception as e:
+                print(f"Warning: spaCy batch extraction failed: {e}")
+        
+        results = []
+        for text, entities in zip(texts, spacy_entities):
+            entities = entities + self.extract_with_rules(text)
+            if resolve_overlaps:
+                entities = self.resolve_overlapping_entities(entities)
+            results.append(self.deduplicate_entities(entities))
+        
+        return results
+    
+    def unused_entity_components(self, nlp=None):
+        """Pipeline components that do not contribute to doc.ents"""
+        nlp = nlp if nlp is not None else self.nlp
+        if nlp is None:
+            return []
+        
+        needed = {'ner', 'entity_ruler'}
+        # Shared embedding layers are only needed when ner listens to them
+        for name in ('tok2vec', 'transformer'):
+            if name in nlp.pipe_names:
+                listeners = getattr(nlp.get_pipe(name), 'listening_components', [])
+                if needed.intersection(listeners):
+                    needed.add(name)
+        
+        return [name for name in nlp.pipe_names if name not in needed]
+    
     def extract_with_spacy(self, text):
         """Extract entities using spaCy"""
         entities = []
         
         try:
             doc = self.nlp(text)
-            
-            for ent in doc.ents:
-                entities.append({
-                    'text': ent.text,
-                    'label': ent.label_,
-                    'start': ent.start_char,
-                    'end': ent.end_char,
-                    'confidence': 0.8  # Default confidence for spaCy entities
-                })
+            entities = self.entities_from_doc(doc)
         
         except Exception as e:
             print(f"Warning: spaCy extraction failed: {e}")
         
         return entities
     
+    def entities_from_doc(self, doc):
+        """Convert a processed spaCy Doc into entity dicts"""
+        entities = []
+        
+        for ent in doc.ents:
+            entities.append({
+                'text': ent.text,
+                'label': ent.label_,
+                'start': ent.start_char,
+                'end': ent.end_char,
+                'confidence': 0.8,  # Default confidence for spaCy entities
+                'source': 'spacy'
+            })
+        
+        return entities
+    
     def extract_with_rules(self, text):
         """Extract entities using rule-based patterns"""
-        entities = []
         text_lower = text.lower()
+        matches = []
+        last_end = [0] * len(self.rule_labels)
         
-        for category, patterns in self.medical_patterns.items():
-            for pattern in patterns:
-                matches = re.finditer(pattern, text_lower, re.IGNORECASE)
-                for match in matches:
-                    entities.append({
-                        'text': text[match.start():match.end()],
-                        'label': category.upper(),
-                        'start': match.start(),
-                        'end': match.end(),
-                        'confidence': 0.6  # Lower confidence for rule-based
-                    })
+        # Single scan over candidate start positions
+        for candidate in self.rule_scanner.finditer(text_lower):
+            position = candidate.start()
+            found = self.rule_matcher.match(text_lower, position)
+            
+            for name, value in found.groupdict().items():
+                if value is None:
+                    continue
+                index = int(name[1:])
+                # Same non-overlapping semantics as re.finditer per pattern
+                if position < last_end[index]:
+                    continue
+                end = found.end(name)
+                last_end[index] = end
+                matches.append((index, position, end))
+        
+        # Report in category/pattern order, then by position
+        matches.sort()
+        
+        entities = []
+        for index, start, end in matches:
+            entities.append({
+                'text': text[start:end],
+                'label': self.rule_labels[index],
+                'start': start,
+                'end': end,
+                'confidence': 0.6,  # Lower confidence for rule-based
+                'source': 'rules'
+            })
         
         return entities
     
@@ -213,8 +416,61 @@ class MedicalNLP:
         
         return unique_entities
     
-    def analyze_relationships(self, entities, text):
-        """Analyze relationships between entities"""
+    def resolve_overlapping_entities(self, entities):
+        """Merge overlapping spans that describe the same kind of entity
+        
+        Spans are grouped by label family (SYMPTOM and SYMPTOMS are one
+        family), sorted by offset and swept once, so the cost is O(n log n).
+        Each cluster of overlapping spans is replaced by its longest span,
+        ties broken by extractor (SOURCE_PRIORITY) and then confidence; the
+        merged entity keeps the highest confidence in the cluster and lists
+        every contributing span, with its source, under 'merged_from'.
+        Overlaps between different families are kept, since e.g. "constant"
+        is both a DURATION and a SEVERITY cue.
+        """
+        families = defaultdict(list)
+        for entity in entities:
+            families[self.label_families.get(entity['label'], entity['label'])].append(entity)
+        
+        resolved = []
+        for family_entities in families.values():
+            family_entities.sort(key=lambda e: (e['start'], -e['end']))
+            
+            cluster = [family_entities[0]]
+            cluster_end = family_entities[0]['end']
+            for entity in family_entities[1:]:
+                if entity['start'] < cluster_end:
+                    cluster.append(entity)
+                    cluster_end = max(cluster_end, entity['end'])
+                else:
+                    resolved.append(self.merge_entity_cluster(cluster))
+                    cluster = [entity]
+                    cluster_end = entity['end']
+            resolved.append(self.merge_entity_cluster(cluster))
+        
+        resolved.sort(key=lambda e: (e['start'], e['end']))
+        return resolved
+    
+    def merge_entity_cluster(self, cluster):
+        """Collapse a cluster of overlapping spans into one entity"""
+        winner = max(cluster, key=lambda e: (
+            e['end'] - e['start'], self.SOURCE_PRIORITY.get(e.get('source'), -1), e['confidence']
+        ))
+        merged = dict(winner)
+        merged['confidence'] = max(e['confidence'] for e in cluster)
+        merged['merged_from'] = [
+            {key: e.get(key) for key in ('text', 'label', 'start', 'end', 'confidence', 'source')}
+            for e in cluster
+        ]
+        return merged
+    
+    def analyze_relationships(self, entities, text, max_distance=100):
+        """Analyze relationships between entities
+        
+        Each symptom is linked to the nearest duration and severity whose
+        midpoint lies within max_distance characters. Candidates are sorted
+        by midpoint once, so every lookup is a bisect instead of a scan.
+        """
         relationships = []
         
         # Group entities by type
@@ -224,12 +480,12 @@ class MedicalNLP:
         
         # Find symptom-duration relationships
         symptoms = entity_groups.get('SYMPTOM', []) + entity_groups.get('SYMPTOMS', [])
-        durations = entity_groups.get('DURATION', [])
-        severities = entity_groups.get('SEVERITY', [])
+        durations = self.build_position_index(entity_groups.get('DURATION', []))
+        severities = self.build_position_index(entity_groups.get('SEVERITY', []))
         
         for symptom in symptoms:
             # Find closest duration
-            closest_duration = self.find_closest_entity(symptom, durations, text)
+            closest_duration = self.find_nearest_indexed(symptom, durations, max_distance)
             if closest_duration:
                 relationships.append({
                     'type': 'symptom_duration',
@@ -238,7 +494,7 @@ class MedicalNLP:
                 })
             
             # Find closest severity
-            closest_severity = self.find_closest_entity(symptom, severities, text)
+            closest_severity = self.find_nearest_indexed(symptom, severities, max_distance)
             if closest_severity:
                 relationships.append({
                     'type': 'symptom_severity',
@@ -248,7 +504,62 @@ class MedicalNLP:
         
         return relationships
     
-    def find_closest_entity(self, target_entity, candidate_entities, text):
+    def build_position_index(self, candidate_entities):
+        """Sort candidates by midpoint for bisect lookups
+        
+        Returns (midpoints, entities, order, group_start): equal midpoints
+        stay in input order, and group_start[i] points at the first entry
+        sharing midpoint i, which keeps find_closest_entity's tie-breaking
+        (earliest candidate wins).
+        """
+        ordered = sorted(
+            enumerate(candidate_entities),
+            key=lambda item: ((item[1]['start'] + item[1]['end']) / 2, item[0])
+        )
+        midpoints = [(entity['start'] + entity['end']) / 2 for _, entity in ordered]
+        
+        group_start = []
+        for i, midpoint in enumerate(midpoints):
+            if i > 0 and midpoint == midpoints[i - 1]:
+                group_start.append(group_start[i - 1])
+            else:
+                group_start.append(i)
+        
+        return (
+            midpoints,
+            [entity for _, entity in ordered],
+            [order for order, _ in ordered],
+            group_start
+        )
+    
+    def find_nearest_indexed(self, target_entity, position_index, max_distance=100):
+        """Nearest candidate from build_position_index, or None if too far"""
+        midpoints, candidates, order, group_start = position_index
+        if not candidates:
+            return None
+        
+        target_pos = (target_entity['start'] + target_entity['end']) / 2
+        right = bisect.bisect_left(midpoints, target_pos)
+        
+        best = None
+        if right < len(midpoints):
+            best = right
+        if right > 0:
+            left = group_start[right - 1]
+            if best is None:
+                best = left
+            else:
+                left_distance = target_pos - midpoints[left]
+                right_distance = midpoints[right] - target_pos
+                if left_distance < right_distance or (
+                    left_distance == right_distance and order[left] < order[right]
+                ):
+                    best = left
+        
+        distance = abs(target_pos - midpoints[best])
+        return candidates[best] if distance < max_distance else None
+    
+    def find_closest_entity(self, target_entity, candidate_entities, text, max_distance=100):
         """Find the closest entity to a target entity in the text"""
         if not candidate_entities:
             return None
@@ -265,8 +576,8 @@ class MedicalNLP:
                 min_distance = distance
                 closest_entity = candidate
         
-        # Only return if reasonably close (within 100 characters)
-        return closest_entity if min_distance < 100 else None
+        # Only return if reasonably close (within max_distance characters)
+        return closest_entity if min_distance < max_distance else None
     
     def get_entity_summary(self, entities):
         """Get a summary of extracted entities"""
@@ -1,16 +1,48 @@
 import numpy as np
 import pandas as pd
 from collections import defaultdict
+import json
+import os
 import re
+from scipy import sparse
+
+from utility.utils.keyword_index import KeywordIndex
+
+# Near-maximal pain reports, equivalent to searching for any of
+#   pain.*(?:9|10).*(?:out of|/)\s*10
+#   (?:9|10).*(?:out of|/)\s*10.*pain
+#   worst.*headache.*life
+#   never.*felt.*pain.*like
+# but linear in the note length. The pattern is matched at each line start and
+# commits to the earliest occurrence of every token on that line, which is
+# always the best choice because the `.*` gaps cannot cross a newline. The
+# (?=(?P<x>...))(?P=x) pairs act as atomic groups, so a failed line is never
+# retried from a later token. The only token that can end on another line is
+# `(?:out of|/)\s*10`, whose crossing form gets its own branch. Every
+# alternative needs one of SEVERE_PAIN_ANCHORS, so notes without them are
+# skipped with a plain substring check.
+SEVERE_PAIN_ANCHORS = ('pain', 'worst')
+SEVERE_PAIN_PATTERN = re.compile(
+    r'(?=(?P<p1>[^\n]*?pain))(?P=p1)(?=(?P<n1>[^\n]*?(?:9|10)))(?P=n1)[^\n]*?(?:out of|/)\s*10'
+    r'|(?=(?P<n2>[^\n]*?(?:9|10)))(?P=n2)(?:'
+    r'(?=(?P<s2>[^\n]*?(?:out of|/)\s*10))(?P=s2)[^\n]*?pain'
+    r'|[^\n]*?(?:out of|/)[^\S\n]*\n\s*10[^\n]*?pain)'
+    r'|(?=(?P<w3>[^\n]*?worst))(?P=w3)(?=(?P<h3>[^\n]*?headache))(?P=h3)[^\n]*?life'
+    r'|(?=(?P<n4>[^\n]*?never))(?P=n4)(?=(?P<f4>[^\n]*?felt))(?P=f4)'
+    r'(?=(?P<p4>[^\n]*?pain))(?P=p4)[^\n]*?like'
+)
 
 class MRIRecommender:
     """MRI scan recommendation system based on medical entities and symptoms"""
     
-    def __init__(self):
+    def __init__(self, red_flag_rules=None):
         self.symptom_weights = {}
         self.duration_weights = {}
         self.severity_weights = {}
         self.setup_recommendation_rules()
+        
+        if red_flag_rules is not None:
+            self.load_red_flag_rules(red_flag_rules)
     
     def setup_recommendation_rules(self):
         """Setup weights and rules for MRI recommendations"""
@@ -85,6 +117,68 @@ class MRIRecommender:
             'confusion', 'disorientation', 'memory loss',
             'sudden weakness', 'sudden numbness', 'sudden speech'
         ]
+        
+        # Longest note prefix searched for severe pain reports
+        self.max_pain_scan_chars = 1_000_000
+        
+        self.build_rule_index()
+    
+    def build_rule_index(self):
+        """Build keyword lookups and red flag bitmasks from the weight tables
+        
+        Call again after changing any of the weight tables.
+        """
+        # Partial symptom matching: a weight key inside the symptom, or the
+        # symptom inside a weight key; the earliest key in table order wins
+        self.symptom_keys = list(self.symptom_weights)
+        self.symptom_key_rank = {key: rank for rank, key in enumerate(self.symptom_keys)}
+        self.symptom_key_index = KeywordIndex(self.symptom_keys)
+        self.symptom_key_substrings = {}
+        for rank, key in enumerate(self.symptom_keys):
+            for start in range(len(key) + 1):
+                for end in range(start, len(key) + 1):
+                    self.symptom_key_substrings.setdefault(key[start:end], rank)
+        
+        # Modifier keywords, looked up together once per note
+        self.text_keyword_index = KeywordIndex(
+            list(self.duration_weights) + list(self.severity_weights)
+        )
+        
+        # Red flag and urgent keyword lookups
+        self.red_flag_symptoms = list(dict.fromkeys(
+            flag for combination in self.red_flag_combinations for flag in combination
+        ))
+        self.red_flag_index = KeywordIndex(self.red_flag_symptoms)
+        self.urgent_keyword_index = KeywordIndex(self.urgent_keywords)
+        
+        # One bit per red flag symptom, one mask per combination
+        self.red_flag_bits = {flag: 1 << bit for bit, flag in enumerate(self.red_flag_symptoms)}
+        self.red_flag_masks = []
+        for combination in self.red_flag_combinations:
+            mask = 0
+            for flag in combination:
+                mask |= self.red_flag_bits[flag]
+            self.red_flag_masks.append(mask)
+    
+    def load_red_flag_rules(self, rules):
+        """Replace the red flag combinations from a list or a JSON file
+        
+        rules is a list of symptom lists, or the path to a JSON file holding
+        one, either bare or under a "red_flag_combinations" key.
+        """
+        if isinstance(rules, (str, os.PathLike)):
+            with open(rules, encoding='utf-8') as rules_file:
+                rules = json.load(rules_file)
+        
+        if isinstance(rules, dict):
+            rules = rules['red_flag_combinations']
+        
+        self.red_flag_combinations = [list(combination) for combination in rules]
+        self.build_rule_index()
+    
+    def scan_text(self, text):
+        """Lowercase a note once and return every rule keyword it contains"""
+        return self.text_keyword_index.find(text.lower())
     
     def recommend(self, entities, text):
         """Generate MRI recommendation based on entities and text"""
@@ -94,14 +188,17 @@ class MRIRecommender:
             durations = self.extract_entity_texts(entities, ['DURATION'])
             severities = self.extract_entity_texts(entities, ['SEVERITY'])
             
+            # One keyword scan of the note, shared by the modifiers
+            text_keywords = self.scan_text(text)
+            
             # Calculate base score from symptoms
             symptom_score = self.calculate_symptom_score(symptoms)
             
             # Adjust for duration
-            duration_modifier = self.calculate_duration_modifier(durations, text)
+            duration_modifier = self.calculate_duration_modifier(durations, text, text_keywords)
             
             # Adjust for severity
-            severity_modifier = self.calculate_severity_modifier(severities, text)
+            severity_modifier = self.calculate_severity_modifier(severities, text, text_keywords)
             
             # Check for red flag combinations
             red_flag_score = self.check_red_flags(symptoms, text)
@@ -161,11 +258,10 @@ class MRIRecommender:
                 symptom_count += 1
             else:
                 # Check for partial matches
-                for key_symptom, weight in self.symptom_weights.items():
-                    if key_symptom in symptom or symptom in key_symptom:
-                        total_score += weight * 0.8  # Reduced weight for partial match
-                        symptom_count += 1
-                        break
+                key_symptom = self.match_partial_symptom(symptom)
+                if key_symptom is not None:
+                    total_score += self.symptom_weights[key_symptom] * 0.8  # Reduced weight for partial match
+                    symptom_count += 1
         
         # Average score with bonus for multiple symptoms
         if symptom_count == 0:
@@ -181,54 +277,64 @@ class MRIRecommender:
         
         return min(average_score, 1.0)
     
-    def calculate_duration_modifier(self, durations, text):
+    def match_partial_symptom(self, symptom):
+        """First weight key (in table order) contained in or containing symptom"""
+        ranks = [self.symptom_key_rank[key] for key in self.symptom_key_index.find(symptom)]
+        if symptom in self.symptom_key_substrings:
+            ranks.append(self.symptom_key_substrings[symptom])
+        
+        return self.symptom_keys[min(ranks)] if ranks else None
+    
+    def calculate_duration_modifier(self, durations, text, text_keywords=None):
         """Calculate duration modifier"""
         if not durations:
             return 0.0
         
-        modifier = 0.0
-        text_lower = text.lower()
-        
-        for duration in durations:
-            for key_duration, weight in self.duration_weights.items():
-                if key_duration in duration or key_duration in text_lower:
-                    modifier = max(modifier, weight - 0.5)  # Convert to modifier (-0.5 to 0.5)
-        
-        return modifier
+        return self.keyword_modifier(self.duration_weights, durations, text, text_keywords)
     
-    def calculate_severity_modifier(self, severities, text):
+    def calculate_severity_modifier(self, severities, text, text_keywords=None):
         """Calculate severity modifier"""
         if not severities:
             return 0.0
         
-        modifier = 0.0
-        text_lower = text.lower()
+        return self.keyword_modifier(self.severity_weights, severities, text, text_keywords)
+    
+    def keyword_modifier(self, weights, entity_texts, text, text_keywords=None):
+        """Largest (weight - 0.5) over keys found in the entities or the note"""
+        if text_keywords is None:
+            text_keywords = self.scan_text(text)
         
-        for severity in severities:
-            for key_severity, weight in self.severity_weights.items():
-                if key_severity in severity or key_severity in text_lower:
-                    modifier = max(modifier, weight - 0.5)  # Convert to modifier
+        present = set(text_keywords)
+        for entity_text in entity_texts:
+            present |= self.text_keyword_index.find(entity_text)
+        
+        modifier = 0.0
+        for key in present:
+            if key in weights:
+                modifier = max(modifier, weights[key] - 0.5)  # Convert to modifier (-0.5 to 0.5)
         
         return modifier
     
     def check_red_flags(self, symptoms, text):
         """Check for red flag combinations"""
-        text_lower = text.lower()
-        all_symptoms = symptoms + [text_lower]  # Include full text for comprehensive check
+        present = self.red_flag_mask(symptoms, text.lower())
         
-        red_flag_score = 0.0
+        # A combination fires when all of its symptom bits are present
+        matches = sum(1 for mask in self.red_flag_masks if present & mask == mask)
         
-        for flag_combination in self.red_flag_combinations:
-            matches = 0
-            for flag_symptom in flag_combination:
-                if any(flag_symptom in symptom for symptom in all_symptoms):
-                    matches += 1
-            
-            # If all symptoms in combination are present
-            if matches == len(flag_combination):
-                red_flag_score += 0.3
+        return min(matches * 0.3, 0.5)  # Cap red flag contribution
+    
+    def red_flag_mask(self, symptoms, text_lower):
+        """Bitmask of the red flag symptoms found in the symptoms or the note"""
+        # Include full text for comprehensive check
+        found = self.red_flag_index.find(text_lower)
+        for symptom in symptoms:
+            found |= self.red_flag_index.find(symptom)
         
-        return min(red_flag_score, 0.5)  # Cap red flag contribution
+        present = 0
+        for flag in found:
+            present |= self.red_flag_bits[flag]
+        return present
     
     def check_urgent_indicators(self, text, symptoms):
         """Check for urgent indicators requiring immediate attention"""
@@ -236,25 +342,167 @@ class MRIRecommender:
         text_lower = text.lower()
         all_text = text_lower + ' ' + ' '.join(symptoms)
         
+        found = self.urgent_keyword_index.find(all_text)
         for urgent_keyword in self.urgent_keywords:
-            if urgent_keyword in all_text:
+            if urgent_keyword in found:
                 urgent_indicators.append(f"Urgent indicator detected: {urgent_keyword}")
         
         # Check for numeric patterns indicating severity
-        severe_pain_patterns = [
-            r'pain.*(?:9|10).*(?:out of|/)\s*10',
-            r'(?:9|10).*(?:out of|/)\s*10.*pain',
-            r'worst.*headache.*life',
-            r'never.*felt.*pain.*like'
-        ]
-        
-        for pattern in severe_pain_patterns:
-            if re.search(pattern, text_lower):
-                urgent_indicators.append("Severe pain intensity reported")
-                break
+        if self.reports_severe_pain(text_lower):
+            urgent_indicators.append("Severe pain intensity reported")
         
         return urgent_indicators
     
+    def reports_severe_pain(self, text_lower):
+        """Whether the note reports a near-maximal pain intensity"""
+        if len(text_lower) > self.max_pain_scan_chars:
+            print(f"Warning: note of {len(text_lower)} characters, scanning the first "
+                  f"{self.max_pain_scan_chars} for pain reports")
+            text_lower = text_lower[:self.max_pain_scan_chars]
+        
+        if not any(anchor in text_lower for anchor in SEVERE_PAIN_ANCHORS):
+            return False
+        
+        line_start = 0
+        while True:
+            if SEVERE_PAIN_PATTERN.match(text_lower, line_start):
+                return True
+            
+            line_start = text_lower.find('\n', line_start) + 1
+            if line_start == 0:
+                return False
+    
+    def recommend_batch(self, entity_lists, texts):
+        """Score a cohort of patients at once
+        
+        Symptoms, modifier keywords, red flag symptoms and urgent keywords are
+        encoded as sparse patient x feature indicator matrices, and every score
+        is then computed with matrix products and row reductions. Returns a
+        DataFrame with one row per patient holding recommendation_score,
+        symptom_count, severity_mentioned, duration_mentioned,
+        red_flags_detected and urgent_indicator_count, matching recommend.
+        """
+        texts = list(texts)
+        patient_count = len(texts)
+        
+        symptom_vocabulary = {}
+        symptom_cells = ([], [])
+        symptom_counts = np.zeros(patient_count, dtype=int)
+        has_durations = np.zeros(patient_count, dtype=bool)
+        has_severities = np.zeros(patient_count, dtype=bool)
+        duration_cells = ([], [])
+        severity_cells = ([], [])
+        red_flag_cells = ([], [])
+        urgent_cells = ([], [])
+        severe_pain = np.zeros(patient_count)
+        
+        keyword_columns = {key: column for column, key in enumerate(self.text_keyword_index.keywords)}
+        red_flag_columns = {flag: column for column, flag in enumerate(self.red_flag_symptoms)}
+        urgent_columns = {keyword: column for column, keyword in enumerate(self.urgent_keywords)}
+        
+        # Entity texts repeat heavily across a cohort, so scan each one once
+        entity_keywords = {}
+        symptom_flags = {}
+        
+        def add_cells(cells, row, columns):
+            cells[0].extend([row] * len(columns))
+            cells[1].extend(columns)
+        
+        # Encode each patient once
+        for row, (entities, text) in enumerate(zip(entity_lists, texts)):
+            symptoms = self.extract_entity_texts(entities, ['SYMPTOM', 'SYMPTOMS'])
+            durations = self.extract_entity_texts(entities, ['DURATION'])
+            severities = self.extract_entity_texts(entities, ['SEVERITY'])
+            text_lower = text.lower()
+            
+            add_cells(symptom_cells, row, [
+                symptom_vocabulary.setdefault(symptom, len(symptom_vocabulary)) for symptom in symptoms
+            ])
+            symptom_counts[row] = len(symptoms)
+            has_durations[row] = bool(durations)
+            has_severities[row] = bool(severities)
+            
+            text_keywords = self.text_keyword_index.find(text_lower)
+            for cells, entity_texts in [(duration_cells, durations), (severity_cells, severities)]:
+                keywords = set(text_keywords)
+                for entity_text in entity_texts:
+                    if entity_text not in entity_keywords:
+                        entity_keywords[entity_text] = self.text_keyword_index.find(entity_text)
+                    keywords |= entity_keywords[entity_text]
+                add_cells(cells, row, [keyword_columns[key] for key in keywords])
+            
+            flags = self.red_flag_index.find(text_lower)
+            for symptom in symptoms:
+                if symptom not in symptom_flags:
+                    symptom_flags[symptom] = self.red_flag_index.find(symptom)
+                flags |= symptom_flags[symptom]
+            add_cells(red_flag_cells, row, [red_flag_columns[flag] for flag in flags])
+            
+            all_text = text_lower + ' ' + ' '.join(symptoms)
+            add_cells(urgent_cells, row, [urgent_columns[keyword] for keyword in self.urgent_keyword_index.find(all_text)])
+            severe_pain[row] = self.reports_severe_pain(text_lower)
+        
+        def indicator_matrix(cells, column_count):
+            data = np.ones(len(cells[0]))
+            return sparse.csr_matrix((data, cells), shape=(patient_count, column_count))
+        
+        # Symptom score: weighted average with a multi-symptom bonus
+        symptom_weights = np.zeros(len(symptom_vocabulary))
+        symptom_counted = np.zeros(len(symptom_vocabulary))
+        for symptom, column in symptom_vocabulary.items():
+            if symptom in self.symptom_weights:
+                symptom_weights[column] = self.symptom_weights[symptom]
+                symptom_counted[column] = 1.0
+            else:
+                key_symptom = self.match_partial_symptom(symptom)
+                if key_symptom is not None:
+                    symptom_weights[column] = self.symptom_weights[key_symptom] * 0.8
+                    symptom_counted[column] = 1.0
+        
+        symptom_matrix = indicator_matrix(symptom_cells, len(symptom_vocabulary))
+        symptom_totals = symptom_matrix @ symptom_weights
+        matched_counts = symptom_matrix @ symptom_counted
+        average_scores = np.divide(
+            symptom_totals, matched_counts, out=np.zeros(patient_count), where=matched_counts > 0
+        )
+        bonus = np.where(matched_counts > 2, 1.2, np.where(matched_counts > 1, 1.1, 1.0))
+        symptom_scores = np.minimum(average_scores * bonus, 1.0)
+        
+        # Modifiers: largest (weight - 0.5) over present keys, never below 0
+        def modifier(weights, cells, mentioned):
+            offsets = np.array([weights.get(key, 0.5) - 0.5 for key in self.text_keyword_index.keywords])
+            keyword_matrix = indicator_matrix(cells, len(keyword_columns))
+            best = keyword_matrix.multiply(offsets).tocsr().max(axis=1).toarray().ravel()
+            return np.where(mentioned, np.maximum(best, 0.0), 0.0)
+        
+        duration_modifiers = modifier(self.duration_weights, duration_cells, has_durations)
+        severity_modifiers = modifier(self.severity_weights, severity_cells, has_severities)
+        
+        # Red flags: a combination fires when all of its symptoms are present
+        combination_matrix = np.zeros((len(self.red_flag_symptoms), len(self.red_flag_combinations)))
+        for column, combination in enumerate(self.red_flag_combinations):
+            for flag in combination:
+                combination_matrix[red_flag_columns[flag], column] = 1.0
+        combination_sizes = combination_matrix.sum(axis=0)
+        flag_matches = indicator_matrix(red_flag_cells, len(self.red_flag_symptoms)) @ combination_matrix
+        red_flag_scores = np.minimum((flag_matches == combination_sizes).sum(axis=1) * 0.3, 0.5)
+        
+        base_scores = symptom_scores * (1 + duration_modifiers + severity_modifiers)
+        final_scores = np.minimum(base_scores + red_flag_scores, 1.0)
+        
+        urgent_counts = np.asarray(
+            indicator_matrix(urgent_cells, len(self.urgent_keywords)).sum(axis=1)
+        ).ravel() + severe_pain
+        
+        return pd.DataFrame({
+            'recommendation_score': final_scores,
+            'symptom_count': symptom_counts,
+            'severity_mentioned': has_severities,
+            'duration_mentioned': has_durations,
+            'red_flags_detected': red_flag_scores > 0,
+            'urgent_indicator_count': urgent_counts.astype(int)
+        })
+    
     def generate_reasoning(self, symptoms, durations, severities, has_red_flags):
         """Generate human-readable reasoning for recommendation"""
         reasons = []
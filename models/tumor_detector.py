@@ -5,6 +5,64 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
 import joblib
 import os
+from collections import defaultdict
+from functools import cached_property
+
+# 5x5 structuring element shared read-only by every analysis context
+MORPH_KERNEL = np.ones((5, 5), np.uint8)
+MORPH_KERNEL.flags.writeable = False
+
+class ImageAnalysisContext:
+    """Intermediate image representations shared by every detector stage
+    
+    Each representation is computed on first access and reused afterwards, so
+    predict, extract_features and calculate_quality_score run the grayscale,
+    Laplacian, Canny and morphology passes once per image between them.
+    """
+    
+    def __init__(self, image_array):
+        self.image_array = image_array
+    
+    @cached_property
+    def gray(self):
+        """Grayscale uint8 view of the image"""
+        if len(self.image_array.shape) == 3:
+            gray = cv2.cvtColor(self.image_array, cv2.COLOR_RGB2GRAY)
+        else:
+            gray = self.image_array
+        
+        if np.issubdtype(gray.dtype, np.floating):
+            # Float images in [0, 1]; Canny and calcHist need 8-bit input
+            gray = cv2.convertScaleAbs(gray, alpha=255.0)
+        return gray
+    
+    @cached_property
+    def laplacian(self):
+        """Laplacian response used for texture and sharpness"""
+        return cv2.Laplacian(self.gray, cv2.CV_64F)
+    
+    @cached_property
+    def edges(self):
+        """Canny edge map"""
+        return cv2.Canny(self.gray, 50, 150)
+    
+    @cached_property
+    def opening(self):
+        """Morphological opening with a 5x5 kernel"""
+        return cv2.morphologyEx(self.gray, cv2.MORPH_OPEN, MORPH_KERNEL)
+    
+    @cached_property
+    def closing(self):
+        """Morphological closing with a 5x5 kernel"""
+        return cv2.morphologyEx(self.gray, cv2.MORPH_CLOSE, MORPH_KERNEL)
+    
+    @cached_property
+    def mean_intensity(self):
+        return np.mean(self.gray)
+    
+    @cached_property
+    def std_intensity(self):
+        return np.std(self.gray)
 
 class TumorDetector:
     """Brain tumor detection using computer vision and machine learning"""
@@ -13,6 +71,13 @@ class TumorDetector:
         self.model = None
         self.tumor_types = ['No Tumor', 'Glioma', 'Meningioma', 'Pituitary']
         self.input_size = (224, 224)
+        # Upper probability bound, tumor type and confidence for each band
+        self.probability_bands = [
+            (0.3, 'No Tumor', 0.8),
+            (0.5, 'Pituitary', 0.6),
+            (0.7, 'Meningioma', 0.7),
+            (float('inf'), 'Glioma', 0.75)
+        ]
         self.initialize_model()
     
     def initialize_model(self):
@@ -30,21 +95,20 @@ class TumorDetector:
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
         self.is_feature_based = True
     
-    def extract_features(self, image_array):
+    def extract_features(self, image_array, context=None):
         """Extract features from brain MRI image"""
         try:
-            # Convert to grayscale for feature extraction
-            if len(image_array.shape) == 3:
-                gray = cv2.cvtColor(image_array, cv2.COLOR_RGB2GRAY)
-            else:
-                gray = image_array
+            # Reuse the caller's grayscale/edge/morphology passes when given
+            if context is None:
+                context = ImageAnalysisContext(image_array)
+            gray = context.gray
             
             features = []
             
             # Basic statistical features
             features.extend([
-                np.mean(gray),
-                np.std(gray),
+                context.mean_intensity,
+                context.std_intensity,
                 np.median(gray),
                 np.min(gray),
                 np.max(gray)
@@ -55,7 +119,7 @@ class TumorDetector:
             features.extend(hist.flatten())
             
             # Texture features
-            laplacian = cv2.Laplacian(gray, cv2.CV_64F)
+            laplacian = context.laplacian
             features.extend([
                 np.mean(laplacian),
                 np.std(laplacian),
@@ -63,7 +127,7 @@ class TumorDetector:
             ])
             
             # Edge detection features
-            edges = cv2.Canny(gray, 50, 150)
+            edges = context.edges
             features.extend([
                 np.sum(edges > 0) / edges.size,  # Edge density
                 np.mean(edges),
@@ -71,15 +135,14 @@ class TumorDetector:
             ])
             
             # Morphological features
-            kernel = np.ones((5,5), np.uint8)
-            opening = cv2.morphologyEx(gray, cv2.MORPH_OPEN, kernel)
-            closing = cv2.morphologyEx(gray, cv2.MORPH_CLOSE, kernel)
+            opening = context.opening
+            closing = context.closing
             
             features.extend([
-                float(np.mean(np.array(opening))),
-                float(np.mean(np.array(closing))),
-                float(np.std(np.array(opening))),
-                float(np.std(np.array(closing)))
+                float(np.mean(opening)),
+                float(np.mean(closing)),
+                float(np.std(opening)),
+                float(np.std(closing))
             ])
             
             # Pad or truncate to exactly 100 features
@@ -96,20 +159,17 @@ class TumorDetector:
     def predict(self, image_array):
         """Predict tumor presence and type"""
         try:
+            # Intermediate representations shared by every stage below
+            context = ImageAnalysisContext(image_array)
+            
             # Extract features
-            features = self.extract_features(image_array)
+            features = self.extract_features(image_array, context)
             features = features.reshape(1, -1)
             
-            # Calculate image characteristics
-            if len(image_array.shape) == 3:
-                gray = cv2.cvtColor(image_array, cv2.COLOR_RGB2GRAY)
-            else:
-                gray = image_array
-            
             # Calculate image statistics
-            mean_intensity = np.mean(gray)
-            std_intensity = np.std(gray)
-            edge_density = np.sum(cv2.Canny(gray, 50, 150) > 0) / gray.size
+            mean_intensity = context.mean_intensity
+            std_intensity = context.std_intensity
+            edge_density = np.sum(context.edges > 0) / context.gray.size
             
             # Calculate tumor probability based on image characteristics
             # Higher contrast and edge density might indicate tumor presence
@@ -117,21 +177,10 @@ class TumorDetector:
             tumor_prob = min(max((contrast_score * edge_density * 2), 0.1), 0.9)
             
             # Determine tumor type based on image characteristics
-            if tumor_prob < 0.3:
-                tumor_type = 'No Tumor'
-                confidence = 0.8
-            elif tumor_prob < 0.5:
-                tumor_type = 'Pituitary'
-                confidence = 0.6
-            elif tumor_prob < 0.7:
-                tumor_type = 'Meningioma'
-                confidence = 0.7
-            else:
-                tumor_type = 'Glioma'
-                confidence = 0.75
+            tumor_type, confidence = self.classify_probability(tumor_prob)
             
             # Calculate image quality score
-            quality_score = self.calculate_quality_score(image_array)
+            quality_score = self.calculate_quality_score(image_array, context)
             
             return {
                 'tumor_probability': float(tumor_prob),
@@ -142,28 +191,93 @@ class TumorDetector:
             
         except Exception as e:
             print(f"Error in prediction: {str(e)}")
-            return {
-                'tumor_probability': 0.1,
-                'tumor_type': 'Analysis Error',
-                'confidence': 0.0,
-                'quality_score': 0.5,
-                'error': str(e)
-            }
+            return self.error_result(e)
+    
+    def predict_batch(self, images):
+        """Predict tumor presence and type for a batch of images
+        
+        Accepts a stacked N x H x W (or N x H x W x 3) array or a list of
+        images. Each image gets a single grayscale, Canny and Laplacian pass;
+        the statistics are then computed for all images of the same shape at
+        once. Returns one result dict per image, in input order.
+        """
+        results = [None] * len(images)
+        groups = defaultdict(list)
+        
+        for index, image_array in enumerate(images):
+            try:
+                context = ImageAnalysisContext(image_array)
+                member = (index, context.gray, context.edges, context.laplacian)
+                groups[context.gray.shape].append(member)
+            except Exception as e:
+                print(f"Error in prediction: {str(e)}")
+                results[index] = self.error_result(e)
+        
+        thresholds = np.array([band[0] for band in self.probability_bands[:-1]])
+        
+        for members in groups.values():
+            indices = [member[0] for member in members]
+            grays = np.stack([member[1] for member in members])
+            edges = np.stack([member[2] for member in members])
+            laplacians = np.stack([member[3] for member in members])
+            pixel_count = grays[0].size
+            
+            # Vectorized image statistics over the whole group
+            mean_intensity = grays.mean(axis=(1, 2))
+            std_intensity = grays.std(axis=(1, 2))
+            edge_density = np.count_nonzero(edges, axis=(1, 2)) / pixel_count
+            sharpness = laplacians.var(axis=(1, 2))
+            
+            contrast = std_intensity / (mean_intensity + 1e-6)
+            tumor_probs = np.clip(contrast * edge_density * 2, 0.1, 0.9)
+            
+            quality_scores = (np.minimum(contrast / 2, 1.0) * 0.6 +
+                              np.minimum(sharpness / 1000, 1.0) * 0.4)
+            quality_scores = np.clip(quality_scores, 0.1, 1.0)
+            
+            bands = np.searchsorted(thresholds, tumor_probs, side='right')
+            
+            for index, tumor_prob, band, quality_score in zip(indices, tumor_probs, bands, quality_scores):
+                _, tumor_type, confidence = self.probability_bands[band]
+                results[index] = {
+                    'tumor_probability': float(tumor_prob),
+                    'tumor_type': tumor_type,
+                    'confidence': float(confidence),
+                    'quality_score': float(quality_score)
+                }
+        
+        return results
+    
+    def classify_probability(self, tumor_prob):
+        """Map a tumor probability to a tumor type and confidence"""
+        for upper_bound, tumor_type, confidence in self.probability_bands:
+            if tumor_prob < upper_bound:
+                return tumor_type, confidence
+        
+        _, tumor_type, confidence = self.probability_bands[-1]
+        return tumor_type, confidence
+    
+    def error_result(self, error):
+        """Safe default prediction returned when analysis fails"""
+        return {
+            'tumor_probability': 0.1,
+            'tumor_type': 'Analysis Error',
+            'confidence': 0.0,
+            'quality_score': 0.5,
+            'error': str(error)
+        }
     
-    def calculate_quality_score(self, image_array):
+    def calculate_quality_score(self, image_array, context=None):
         """Calculate image quality score based on contrast and sharpness"""
         try:
-            if len(image_array.shape) == 3:
-                gray = cv2.cvtColor(image_array, cv2.COLOR_RGB2GRAY)
-            else:
-                gray = image_array
+            if context is None:
+                context = ImageAnalysisContext(image_array)
             
             # Calculate contrast
-            contrast = np.std(gray) / (np.mean(gray) + 1e-6)
+            contrast = context.std_intensity / (context.mean_intensity + 1e-6)
             
             # Calculate sharpness using Laplacian variance
-            laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-            sharpness = np.var(laplacian)
+            sharpness = np.var(context.laplacian)
             
             # Normalize scores
             contrast_score = min(contrast / 2, 1.0)
@@ -0,0 +1,173 @@
+"""
+Batch tumor scoring for directories of brain MRI slices
+
+Usage:
+    python score_images.py scans/ --output results.csv
+    python score_images.py "scans/**/*.png" --output results.jsonl --workers 8
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.tumor_detector import TumorDetector
+from utility.utils.image_processor import ImageProcessor
+
+SUPPORTED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff')
+RESULT_FIELDS = ['image_path', 'tumor_probability', 'tumor_type', 'confidence', 'quality_score', 'error']
+
+# Warm per-process models, created once by init_worker
+_detector = None
+_image_processor = None
+
+def init_worker():
+    """Load the detector and image processor once per worker process"""
+    global _detector, _image_processor
+    _detector = TumorDetector()
+    _image_processor = ImageProcessor()
+
+def score_decoded(decoded_images):
+    """Preprocess and score a chunk of (image_path, image_array, error) items"""
+    results = [None] * len(decoded_images)
+    indices = []
+    processed_images = []
+
+    for index, (image_path, image_array, error) in enumerate(decoded_images):
+        if error is not None:
+            results[index] = _detector.error_result(error)
+            continue
+        try:
+            processed_images.append(_image_processor.preprocess_image(image_array))
+            indices.append(index)
+        except Exception as e:
+            results[index] = _detector.error_result(e)
+
+    for index, result in zip(indices, _detector.predict_batch(processed_images)):
+        results[index] = result
+
+    return [
+        {'image_path': item[0], **result}
+        for item, result in zip(decoded_images, results)
+    ]
+
+def score_paths(image_paths):
+    """Decode and score a chunk of image files inside a worker process"""
+    decoded_images = []
+    for image_path in image_paths:
+        try:
+            decoded_images.append((image_path, _image_processor.load_image(image_path), None))
+        except Exception as e:
+            decoded_images.append((image_path, None, str(e)))
+    return score_decoded(decoded_images)
+
+def iter_chunks(items, size):
+    """Split an iterable into lists of at most `size` items"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def score_in_pool(image_paths, workers, chunksize):
+    """Score chunks across worker processes with a bounded number in flight"""
+    max_in_flight = workers * 2
+    pending = deque()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        for chunk in iter_chunks(image_paths, chunksize):
+            pending.append(executor.submit(score_paths, chunk))
+            if len(pending) >= max_in_flight:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def score_in_process(image_paths, chunksize, prefetch):
+    """Score in the current process, decoding ahead on a background thread"""
+    init_worker()
+    decoded_stream = _image_processor.iter_images(image_paths, prefetch=prefetch)
+    for chunk in iter_chunks(decoded_stream, chunksize):
+        yield from score_decoded(chunk)
+
+def collect_image_paths(target):
+    """Expand a directory or glob pattern into a sorted list of image paths"""
+    if os.path.isdir(target):
+        paths = []
+        for root, _, files in os.walk(target):
+            for name in files:
+                if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    paths.append(os.path.join(root, name))
+    else:
+        paths = [
+            path for path in glob.glob(target, recursive=True)
+            if os.path.isfile(path) and path.lower().endswith(SUPPORTED_EXTENSIONS)
+        ]
+    return sorted(paths)
+
+def open_result_writer(output_path, output_format):
+    """Return (write_row, close) callables that stream results to disk"""
+    output_file = open(output_path, 'w', newline='', encoding='utf-8')
+
+    if output_format == 'csv':
+        writer = csv.DictWriter(output_file, fieldnames=RESULT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        write_row = writer.writerow
+    else:
+        def write_row(row):
+            output_file.write(json.dumps(row) + '\n')
+
+    return write_row, output_file.close
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a directory or glob of brain MRI images")
+    parser.add_argument('target', help="Directory to walk or glob pattern (quote it to avoid shell expansion)")
+    parser.add_argument('--output', '-o', required=True, help="Output file (.csv or .jsonl)")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help="Output format (default: from the output extension)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Number of worker processes (1 scores in-process)")
+    parser.add_argument('--chunksize', type=int, default=16, help="Images scored per predict_batch call")
+    parser.add_argument('--prefetch', type=int, default=32, help="Images decoded ahead when scoring in-process")
+    args = parser.parse_args(argv)
+
+    output_format = args.format or ('csv' if args.output.lower().endswith('.csv') else 'jsonl')
+    image_paths = collect_image_paths(args.target)
+    if not image_paths:
+        print(f"No images found for {args.target}", file=sys.stderr)
+        return 1
+
+    write_row, close = open_result_writer(args.output, output_format)
+    start_time = time.perf_counter()
+    errors = 0
+
+    if args.workers > 1:
+        results = score_in_pool(image_paths, args.workers, args.chunksize)
+    else:
+        results = score_in_process(image_paths, args.chunksize, args.prefetch)
+
+    try:
+        for result in results:
+            if 'error' in result:
+                errors += 1
+            write_row(result)
+    finally:
+        close()
+
+    elapsed = time.perf_counter() - start_time
+    print(
+        f"Scored {len(image_paths)} images ({errors} errors) in {elapsed:.1f}s "
+        f"with {args.workers} workers -> {args.output}",
+        file=sys.stderr
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Unified medical abbreviation expansion shared by TextProcessor and MedicalNLP
+"""
+import threading
+
+from utility.utils.data.medical_entities import MEDICAL_ABBREVIATIONS
+
+# Punctuation allowed after an abbreviation; kept in the output
+TRAILING_PUNCTUATION = '.,;:'
+
+class AbbreviationIndex:
+    """Expand abbreviations, including multi-word and punctuated forms, in one pass
+
+    Abbreviations are matched case-insensitively against whitespace-separated
+    tokens, so 'c/o', 'w/' and 'o2 sat' expand while 'pt' inside 'ptosis' does
+    not. Trailing '.,;:' on the last token is ignored for matching and kept in
+    the output. Multi-word entries live in a token trie keyed by their first
+    word, and the longest entry starting at each token wins.
+    """
+
+    # Trie key marking the end of an abbreviation
+    END = None
+
+    def __init__(self, *tables):
+        """Merge the tables in order; later tables win on duplicate entries"""
+        self.abbreviations = {}
+        for table in tables:
+            for abbreviation, expansion in table.items():
+                self.abbreviations[' '.join(abbreviation.lower().split())] = expansion
+
+        self.trie = {}
+        for abbreviation, expansion in self.abbreviations.items():
+            node = self.trie
+            for word in abbreviation.split():
+                node = node.setdefault(word, {})
+            node[self.END] = expansion
+
+        # First words as they look once trailing punctuation is stripped
+        self.starts = {word.rstrip(TRAILING_PUNCTUATION) for word in self.trie}
+
+    def expand(self, text):
+        """Return text with every abbreviation expanded and whitespace normalized"""
+        words = text.split()
+        expanded_words = []
+        starts = self.starts
+        resume = 0
+
+        for position, word in enumerate(words):
+            if position < resume:
+                continue
+
+            # Most words cannot start an abbreviation; skip the trie walk
+            if word.lower().rstrip(TRAILING_PUNCTUATION) in starts:
+                match = self.match_at(words, position)
+                if match is not None:
+                    expansion, resume = match
+                    expanded_words.append(expansion)
+                    continue
+
+            expanded_words.append(word)
+
+        return ' '.join(expanded_words)
+
+    def match_at(self, words, start):
+        """Longest abbreviation starting at words[start], as (expansion, next position)"""
+        match = None
+        node = self.trie
+
+        for position in range(start, len(words)):
+            word = words[position]
+            word_lower = word.lower()
+            stripped = word_lower.rstrip(TRAILING_PUNCTUATION)
+
+            if word_lower in node and self.END in node[word_lower]:
+                match = (node[word_lower][self.END], position + 1)
+            elif stripped in node and self.END in node[stripped]:
+                suffix = word[len(word.rstrip(TRAILING_PUNCTUATION)):]
+                match = (node[stripped][self.END] + suffix, position + 1)
+
+            # Later words of a multi-word entry must match exactly
+            node = node.get(word_lower)
+            if not node:
+                break
+
+        return match
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+def get_abbreviation_index():
+    """Shared index over MEDICAL_ABBREVIATIONS, built on first use"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = AbbreviationIndex(MEDICAL_ABBREVIATIONS)
+        return _default_index
@@ -1,11 +1,31 @@
 """
 Data models for the Medical AI System
 """
-from datetime import datetime
+import argparse
+import atexit
+import bisect
+import itertools
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 
+def intern_label(value):
+    """Share one copy of a repeated categorical string (gender, severity, tumor type, ...)"""
+    return sys.intern(value) if type(value) is str else value
+
 class PatientRecord:
     """Patient record model"""
+    __slots__ = ('id', 'patient_age', 'patient_gender', 'symptoms', 'severity', 'duration',
+                 'medical_history', 'created_at')
+    
     def __init__(self,
                  patient_age: Optional[int] = None,
                  patient_gender: Optional[str] = None,
@@ -15,15 +35,18 @@ class PatientRecord:
                  medical_history: Optional[str] = None):
         self.id: Optional[int] = None
         self.patient_age = patient_age
-        self.patient_gender = patient_gender
+        self.patient_gender = intern_label(patient_gender)
         self.symptoms = symptoms
-        self.severity = severity
-        self.duration = duration
+        self.severity = intern_label(severity)
+        self.duration = intern_label(duration)
         self.medical_history = medical_history
         self.created_at = datetime.utcnow()
 
 class MedicalAnalysis:
     """Medical text analysis results"""
+    __slots__ = ('id', 'patient_record_id', 'extracted_entities', 'symptom_count',
+                 'severity_indicators', 'duration_present', 'processed_text', 'created_at')
+    
     def __init__(self,
                  patient_record_id: Optional[int] = None,
                  extracted_entities: Optional[Dict[str, Any]] = None,
@@ -42,6 +65,9 @@ class MedicalAnalysis:
 
 class MRIRecommendation:
     """MRI scan recommendations"""
+    __slots__ = ('id', 'analysis_id', 'recommendation_score', 'recommendation_text', 'urgency_level',
+                 'reasons', 'urgent_indicators', 'red_flags_detected', 'created_at')
+    
     def __init__(self,
                  analysis_id: Optional[int] = None,
                  recommendation_score: Optional[float] = None,
@@ -54,7 +80,7 @@ class MRIRecommendation:
         self.analysis_id = analysis_id
         self.recommendation_score = recommendation_score
         self.recommendation_text = recommendation_text
-        self.urgency_level = urgency_level
+        self.urgency_level = intern_label(urgency_level)
         self.reasons = reasons
         self.urgent_indicators = urgent_indicators
         self.red_flags_detected = red_flags_detected
@@ -62,6 +88,9 @@ class MRIRecommendation:
 
 class TumorAnalysis:
     """Brain tumor detection analysis"""
+    __slots__ = ('id', 'image_filename', 'tumor_probability', 'tumor_type', 'confidence_score',
+                 'quality_score', 'analysis_method', 'created_at')
+    
     def __init__(self,
                  image_filename: Optional[str] = None,
                  tumor_probability: Optional[float] = None,
@@ -72,31 +101,760 @@ class TumorAnalysis:
         self.id: Optional[int] = None
         self.image_filename = image_filename
         self.tumor_probability = tumor_probability
-        self.tumor_type = tumor_type
+        self.tumor_type = intern_label(tumor_type)
         self.confidence_score = confidence_score
         self.quality_score = quality_score
-        self.analysis_method = analysis_method
+        self.analysis_method = intern_label(analysis_method)
         self.created_at = datetime.utcnow()
 
-class DatabaseManager:
-    """In-memory database manager"""
+# Storage table -> (record class, stored attributes, attributes kept as JSON)
+RECORD_TABLES = {
+    'patients': (
+        PatientRecord,
+        ['patient_age', 'patient_gender', 'symptoms', 'severity', 'duration', 'medical_history'],
+        []
+    ),
+    'analyses': (
+        MedicalAnalysis,
+        ['patient_record_id', 'extracted_entities', 'symptom_count', 'severity_indicators',
+         'duration_present', 'processed_text'],
+        ['extracted_entities']
+    ),
+    'recommendations': (
+        MRIRecommendation,
+        ['analysis_id', 'recommendation_score', 'recommendation_text', 'urgency_level', 'reasons',
+         'urgent_indicators', 'red_flags_detected'],
+        ['reasons', 'urgent_indicators']
+    ),
+    'tumor_analyses': (
+        TumorAnalysis,
+        ['image_filename', 'tumor_probability', 'tumor_type', 'confidence_score', 'quality_score',
+         'analysis_method'],
+        []
+    )
+}
+
+# Stored as INTEGER in SQLite, restored as bool
+BOOLEAN_COLUMNS = {'duration_present', 'red_flags_detected'}
+
+# Low-cardinality text columns, interned when records are built
+LABEL_COLUMNS = {'patient_gender', 'severity', 'duration', 'urgency_level', 'tumor_type', 'analysis_method'}
+
+def json_default(value):
+    """JSON fallback for NumPy scalars and other non-JSON values"""
+    return value.item() if hasattr(value, 'item') else str(value)
+
+# Recommendation scores at or above this count as urgent
+URGENT_SCORE_THRESHOLD = 0.7
+
+# Recommendation score histogram: ten bins of width 0.1 over [0, 1]
+SCORE_HISTOGRAM_BINS = 10
+
+def score_bin(score):
+    """Histogram bin of a recommendation score, clamped to the first and last bins"""
+    return min(max(int(score * SCORE_HISTOGRAM_BINS), 0), SCORE_HISTOGRAM_BINS - 1)
+
+class StatisticsCounters:
+    """Running aggregates over the stored records, updated on every save
+    
+    Holds per-table counts, the urgent recommendation count, a score
+    histogram, the tumor type distribution and per-day counts per table, so
+    the dashboard reads statistics without scanning any records. Saves are
+    described as (name, key) increments (see changes), which the SQLite
+    backend applies to its own counter rows in the insert transaction and
+    the manager applies here once that transaction has committed.
+    """
     def __init__(self):
-        self.patients = []
-        self.analyses = []
-        self.recommendations = []
-        self.tumor_analyses = []
-        self._next_id = 1
+        self.counts: Dict[str, int] = {table: 0 for table in RECORD_TABLES}
+        self.urgent_recommendations = 0
+        self.score_histogram: List[int] = [0] * SCORE_HISTOGRAM_BINS
+        self.tumor_types: Counter = Counter()
+        self.daily_counts: Dict[str, Counter] = {}
+    
+    @staticmethod
+    def changes(batch):
+        """Counter of (name, key) increments for storing a {table: records} batch"""
+        changes = Counter()
+        for table, records in batch.items():
+            for record in records:
+                changes['counts', table] += 1
+                changes['daily_counts', f"{record.created_at.date().isoformat()} {table}"] += 1
+                
+                if table == 'recommendations' and record.recommendation_score is not None:
+                    if record.recommendation_score >= URGENT_SCORE_THRESHOLD:
+                        changes['urgent_recommendations', ''] += 1
+                    changes['score_histogram', str(score_bin(record.recommendation_score))] += 1
+                elif table == 'tumor_analyses' and record.tumor_type is not None:
+                    changes['tumor_types', record.tumor_type] += 1
+        return changes
+    
+    def apply(self, changes):
+        """Add (name, key) increments, as produced by changes or read back by rows"""
+        for (name, key), amount in changes.items():
+            if name == 'counts':
+                self.counts[key] = self.counts.get(key, 0) + amount
+            elif name == 'urgent_recommendations':
+                self.urgent_recommendations += amount
+            elif name == 'score_histogram':
+                self.score_histogram[int(key)] += amount
+            elif name == 'tumor_types':
+                self.tumor_types[key] += amount
+            elif name == 'daily_counts':
+                day, table = key.split(' ')
+                self.daily_counts.setdefault(day, Counter())[table] += amount
+    
+    def add(self, table, record):
+        """Account for one stored record"""
+        self.apply(self.changes({table: [record]}))
+    
+    def rows(self):
+        """(name, key, value) for every non-zero counter; apply() reverses it"""
+        rows = [('counts', table, count) for table, count in self.counts.items()]
+        rows.append(('urgent_recommendations', '', self.urgent_recommendations))
+        rows.extend(('score_histogram', str(index), count) for index, count in enumerate(self.score_histogram))
+        rows.extend(('tumor_types', tumor_type, count) for tumor_type, count in self.tumor_types.items())
+        rows.extend(
+            ('daily_counts', f"{day} {table}", count)
+            for day, counts in self.daily_counts.items() for table, count in counts.items()
+        )
+        return [row for row in rows if row[2]]
+    
+    def recent_daily_counts(self, days):
+        """{day: {table: count}} for the last `days` UTC days that had saves"""
+        today = datetime.utcnow().date()
+        recent = {}
+        for offset in range(days):
+            day = (today - timedelta(days=offset)).isoformat()
+            if day in self.daily_counts:
+                recent[day] = dict(self.daily_counts[day])
+        return recent
+    
+    def to_dict(self):
+        return {
+            'counts': dict(self.counts),
+            'urgent_recommendations': self.urgent_recommendations,
+            'score_histogram': list(self.score_histogram),
+            'tumor_types': {tumor_type: n for tumor_type, n in self.tumor_types.items() if n},
+            'daily_counts': {
+                day: {table: n for table, n in counts.items() if n}
+                for day, counts in sorted(self.daily_counts.items()) if any(counts.values())
+            }
+        }
+    
+    def differences(self, other):
+        """{field: (self value, other value)} for every field that disagrees"""
+        mine, theirs = self.to_dict(), other.to_dict()
+        return {key: (mine[key], theirs[key]) for key in mine if mine[key] != theirs[key]}
+
+class InMemoryBackend:
+    """Record storage in Python lists; nothing survives a restart
+    
+    Each table is kept sorted by id, with a parallel list of ids, so the
+    newest records sit at the end and a cursor page is a bisect plus a slice.
+    Every table has its own lock, so pages and reads of one table never
+    wait on inserts into another.
+    """
+    def __init__(self):
+        self.tables: Dict[str, List[Any]] = {table: [] for table in RECORD_TABLES}
+        self.ids: Dict[str, List[int]] = {table: [] for table in RECORD_TABLES}
+        self.locks = {table: threading.Lock() for table in RECORD_TABLES}
     
     def create_tables(self):
         """No-op as we're using in-memory storage"""
         pass
     
+    def insert(self, table, records, changes=None):
+        """Add records that already carry their ids, keeping the table in id order"""
+        rows, ids = self.tables[table], self.ids[table]
+        with self.locks[table]:
+            for record in records:
+                if not ids or record.id > ids[-1]:
+                    rows.append(record)
+                    ids.append(record.id)
+                else:
+                    # A batch flushed after later single saves; rare, so insort is fine
+                    position = bisect.bisect_left(ids, record.id)
+                    rows.insert(position, record)
+                    ids.insert(position, record.id)
+    
+    def insert_batch(self, batch, changes=None):
+        """Insert {table: records} in one go"""
+        for table, records in batch.items():
+            self.insert(table, records)
+    
+    def check(self, table, record):
+        """Any record can be held in memory"""
+        pass
+    
+    def load_statistics(self):
+        """Nothing is persisted, so counters are always rebuilt"""
+        return None
+    
+    def save_statistics(self, statistics):
+        pass
+    
+    def compute_statistics(self):
+        """Aggregate the stored records from scratch"""
+        statistics = StatisticsCounters()
+        for table in self.tables:
+            for record in self.all(table):
+                statistics.add(table, record)
+        return statistics
+    
+    def max_id(self):
+        """Largest id stored in any table, or 0"""
+        return max((ids[-1] for ids in self.ids.values() if ids), default=0)
+    
+    def count(self, table):
+        return len(self.tables[table])
+    
+    def page(self, table, after_id, limit):
+        """Up to limit records older than after_id (or the newest), newest first"""
+        rows = self.tables[table]
+        with self.locks[table]:
+            end = len(rows) if after_id is None else bisect.bisect_left(self.ids[table], after_id)
+            return rows[max(end - limit, 0):end][::-1]
+    
+    def all(self, table):
+        with self.locks[table]:
+            return list(self.tables[table])
+    
+    def close(self):
+        pass
+
+class PackedRecord(tuple):
+    """Record values as a tuple: id, the table's columns, then created_at"""
+    __slots__ = ()
+    
+    @property
+    def id(self):
+        return self[0]
+
+class CompactInMemoryBackend(InMemoryBackend):
+    """In-memory storage packed for long-running deployments
+    
+    Records are kept as plain tuples in column order, with the nested
+    entity/reason dicts held as compact JSON strings, and rebuilt into
+    record objects only when read, trading a JSON decode per record read
+    for a smaller footprint (see benchmarks/bench_record_memory.py).
+    """
+    def insert(self, table, records, changes=None):
+        super().insert(table, [self.pack(table, record) for record in records])
+    
+    @staticmethod
+    def pack(table, record):
+        # InMemoryBackend only needs .id to keep the table ordered
+        _, columns, json_columns = RECORD_TABLES[table]
+        values = [record.id]
+        for column in columns:
+            value = getattr(record, column)
+            if value is not None and column in json_columns:
+                value = json.dumps(value, default=json_default, separators=(',', ':'))
+            values.append(value)
+        values.append(record.created_at)
+        return PackedRecord(values)
+    
+    @staticmethod
+    def unpack(table, packed):
+        record_class, columns, json_columns = RECORD_TABLES[table]
+        record = record_class.__new__(record_class)
+        record.id = packed[0]
+        for column, value in zip(columns, packed[1:]):
+            if value is not None and column in json_columns:
+                value = json.loads(value)
+            setattr(record, column, value)
+        record.created_at = packed[-1]
+        return record
+    
+    def page(self, table, after_id, limit):
+        return [self.unpack(table, packed) for packed in super().page(table, after_id, limit)]
+    
+    def all(self, table):
+        return [self.unpack(table, packed) for packed in super().all(table)]
+
+class SQLiteBackend:
+    """Record storage in an SQLite file
+    
+    Uses WAL mode so dashboard reads do not block writers, and indexes
+    created_at, recommendation_score and the foreign key columns so the
+    dashboard queries stay fast with millions of rows. Dict fields are
+    stored as JSON text.
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self.create_tables()
+    
+    def create_tables(self):
+        """Create tables and indexes if they do not exist"""
+        with self._lock, self._connection:
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS patients (
+                    id INTEGER PRIMARY KEY,
+                    patient_age INTEGER,
+                    patient_gender TEXT,
+                    symptoms TEXT,
+                    severity TEXT,
+                    duration TEXT,
+                    medical_history TEXT,
+                    created_at TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS analyses (
+                    id INTEGER PRIMARY KEY,
+                    patient_record_id INTEGER REFERENCES patients(id),
+                    extracted_entities TEXT,
+                    symptom_count INTEGER,
+                    severity_indicators INTEGER,
+                    duration_present INTEGER,
+                    processed_text TEXT,
+                    created_at TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS recommendations (
+                    id INTEGER PRIMARY KEY,
+                    analysis_id INTEGER REFERENCES analyses(id),
+                    recommendation_score REAL,
+                    recommendation_text TEXT,
+                    urgency_level TEXT,
+                    reasons TEXT,
+                    urgent_indicators TEXT,
+                    red_flags_detected INTEGER,
+                    created_at TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS tumor_analyses (
+                    id INTEGER PRIMARY KEY,
+                    image_filename TEXT,
+                    tumor_probability REAL,
+                    tumor_type TEXT,
+                    confidence_score REAL,
+                    quality_score REAL,
+                    analysis_method TEXT,
+                    created_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_patients_created_at ON patients (created_at);
+                CREATE INDEX IF NOT EXISTS idx_analyses_created_at ON analyses (created_at);
+                CREATE INDEX IF NOT EXISTS idx_analyses_patient_record_id ON analyses (patient_record_id);
+                CREATE INDEX IF NOT EXISTS idx_recommendations_created_at ON recommendations (created_at);
+                CREATE INDEX IF NOT EXISTS idx_recommendations_analysis_id ON recommendations (analysis_id);
+                CREATE INDEX IF NOT EXISTS idx_recommendations_score ON recommendations (recommendation_score);
+                CREATE INDEX IF NOT EXISTS idx_tumor_analyses_created_at ON tumor_analyses (created_at);
+                CREATE TABLE IF NOT EXISTS statistics_counters (
+                    name TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value INTEGER NOT NULL,
+                    PRIMARY KEY (name, key)
+                );
+            """)
+    
+    @staticmethod
+    def to_row(table, record):
+        _, columns, json_columns = RECORD_TABLES[table]
+        values = [record.id]
+        for column in columns:
+            value = getattr(record, column)
+            if value is not None:
+                if column in json_columns:
+                    value = json.dumps(value, default=json_default)
+                elif hasattr(value, 'item'):
+                    # NumPy scalar
+                    value = value.item()
+            values.append(value)
+        values.append(record.created_at.isoformat())
+        return values
+    
+    @staticmethod
+    def from_row(table, row):
+        record_class, columns, json_columns = RECORD_TABLES[table]
+        record = record_class.__new__(record_class)
+        record.id = row[0]
+        for column, value in zip(columns, row[1:]):
+            if value is not None:
+                if column in json_columns:
+                    value = json.loads(value)
+                elif column in BOOLEAN_COLUMNS:
+                    value = bool(value)
+                elif column in LABEL_COLUMNS:
+                    value = intern_label(value)
+            setattr(record, column, value)
+        record.created_at = datetime.fromisoformat(row[-1])
+        return record
+    
+    def check(self, table, record):
+        """Raise ValueError unless record converts to a row SQLite can store"""
+        _, columns, _ = RECORD_TABLES[table]
+        row = self.to_row(table, record)
+        for column, value in zip(columns, row[1:-1]):
+            if value is None or isinstance(value, (str, float, bytes)):
+                continue
+            if isinstance(value, int) and -2 ** 63 <= value < 2 ** 63:
+                continue
+            raise ValueError(f"Cannot store {type(value).__name__} in {table}.{column}")
+    
+    @staticmethod
+    def insert_sql(table):
+        columns = ['id'] + RECORD_TABLES[table][1] + ['created_at']
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    
+    def insert(self, table, records, changes=None):
+        """Insert records that already carry their ids, in one transaction"""
+        self.insert_batch({table: records}, changes)
+    
+    def insert_batch(self, batch, changes=None):
+        """Insert {table: records} in one transaction with executemany
+        
+        When given, the (name, key) counter increments are applied in the
+        same transaction, touching only the counters the batch changes, so
+        the counters never drift from the rows.
+        """
+        with self._lock, self._connection:
+            for table, records in batch.items():
+                self._connection.executemany(
+                    self.insert_sql(table), [self.to_row(table, record) for record in records]
+                )
+            if changes:
+                self._connection.executemany(
+                    "INSERT INTO statistics_counters (name, key, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT (name, key) DO UPDATE SET value = value + excluded.value",
+                    [(name, key, amount) for (name, key), amount in changes.items()]
+                )
+    
+    def load_statistics(self):
+        """Counters persisted alongside the rows, or None"""
+        rows = self.select("SELECT name, key, value FROM statistics_counters")
+        if not rows:
+            return None
+        statistics = StatisticsCounters()
+        statistics.apply({(name, key): value for name, key, value in rows})
+        return statistics
+    
+    def save_statistics(self, statistics):
+        """Replace every persisted counter with statistics"""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM statistics_counters")
+            self._connection.executemany(
+                "INSERT INTO statistics_counters (name, key, value) VALUES (?, ?, ?)", statistics.rows()
+            )
+    
+    def compute_statistics(self):
+        """Aggregate the stored rows from scratch with SQL"""
+        statistics = StatisticsCounters()
+        for table in RECORD_TABLES:
+            statistics.counts[table] = self.count(table)
+            for day, count in self.select(
+                f"SELECT substr(created_at, 1, 10), COUNT(*) FROM {table} GROUP BY 1"
+            ):
+                statistics.daily_counts.setdefault(day, Counter())[table] = count
+        
+        statistics.urgent_recommendations = self.count_score_at_least(URGENT_SCORE_THRESHOLD)
+        for bin_index, count in self.select(
+            "SELECT MIN(MAX(CAST(recommendation_score * ? AS INTEGER), 0), ?), COUNT(*) "
+            "FROM recommendations WHERE recommendation_score IS NOT NULL GROUP BY 1",
+            (SCORE_HISTOGRAM_BINS, SCORE_HISTOGRAM_BINS - 1)
+        ):
+            statistics.score_histogram[bin_index] = count
+        
+        for tumor_type, count in self.select(
+            "SELECT tumor_type, COUNT(*) FROM tumor_analyses WHERE tumor_type IS NOT NULL GROUP BY 1"
+        ):
+            statistics.tumor_types[tumor_type] = count
+        return statistics
+    
+    def select(self, sql, parameters=()):
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+    
+    def max_id(self):
+        """Largest id stored in any table, or 0"""
+        return max(self.select(f"SELECT COALESCE(MAX(id), 0) FROM {table}")[0][0] for table in RECORD_TABLES)
+    
+    def count(self, table):
+        return self.select(f"SELECT COUNT(*) FROM {table}")[0][0]
+    
+    def count_score_at_least(self, threshold):
+        """Number of recommendations scoring at least threshold"""
+        return self.select(
+            "SELECT COUNT(*) FROM recommendations WHERE recommendation_score >= ?", (threshold,)
+        )[0][0]
+    
+    def page(self, table, after_id, limit):
+        """Up to limit records older than after_id (or the newest), newest first
+        
+        Walks the primary key backwards, so a page costs O(log n + limit)
+        however deep into the history it starts.
+        """
+        columns = ['id'] + RECORD_TABLES[table][1] + ['created_at']
+        if after_id is None:
+            rows = self.select(
+                f"SELECT {', '.join(columns)} FROM {table} ORDER BY id DESC LIMIT ?", (limit,)
+            )
+        else:
+            rows = self.select(
+                f"SELECT {', '.join(columns)} FROM {table} WHERE id < ? ORDER BY id DESC LIMIT ?",
+                (after_id, limit)
+            )
+        return [self.from_row(table, row) for row in rows]
+    
+    def all(self, table):
+        columns = ['id'] + RECORD_TABLES[table][1] + ['created_at']
+        rows = self.select(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+        return [self.from_row(table, row) for row in rows]
+    
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+class WriteBehindError(Exception):
+    """Queued records that the write-behind thread could not store
+    
+    failed holds (pending, error) pairs, pending being the {table: records}
+    that were not written; the manager also keeps them in failed_writes
+    until retry_failed_writes() stores them. A flush that times out, or
+    finds the writer thread gone, raises it with an empty failed list and
+    the reason as message.
+    """
+    def __init__(self, failed, message=None):
+        self.failed = failed
+        if message is None:
+            count = sum(len(records) for pending, _ in failed for records in pending.values())
+            message = f"{count} queued records could not be stored: {failed[0][1]}"
+        super().__init__(message)
+
+class DatabaseManager:
+    """Database manager over a pluggable storage backend
+    
+    Defaults to in-memory storage; pass SQLiteBackend(path) to persist
+    records across restarts. Ids are allocated here, from one sequence
+    shared by every record type.
+    
+    Safe to share between threads (the app caches one instance for every
+    session). Writes lock only the tables they touch, so saves to different
+    tables run concurrently. With write_behind=True, saves are checked
+    against the backend, then return as soon as their id is allocated, and
+    a background writer inserts queued records in batches of up to
+    write_batch_size. At most max_queued saves wait in the queue; beyond
+    that, saves block until the writer catches up, which also bounds how
+    long a read waits. Reads first wait for the saves queued before them,
+    for at most flush_timeout seconds; records the writer could not store,
+    a timeout and a dead writer are raised from the read as a
+    WriteBehindError.
+    """
+    def __init__(self, backend=None, write_behind=False, write_batch_size=500, max_queued=2000,
+                 flush_timeout=60.0):
+        self.backend = backend if backend is not None else InMemoryBackend()
+        self._ids = itertools.count(self.backend.max_id() + 1)
+        self._id_lock = threading.Lock()
+        self._batch = threading.local()
+        
+        # One lock per table for writes; the counters have their own
+        self._table_locks = {table: threading.Lock() for table in RECORD_TABLES}
+        self._statistics_lock = threading.Lock()
+        self.statistics = self.backend.load_statistics()
+        if self.statistics is None:
+            self.statistics = self.backend.compute_statistics()
+            # Later saves persist increments only, so store the baseline they add to
+            self.backend.save_statistics(self.statistics)
+        
+        self.failed_writes = []
+        self._queue = None
+        if write_behind:
+            self.write_batch_size = write_batch_size
+            self.flush_timeout = flush_timeout
+            self._queue = queue.Queue(maxsize=max_queued)
+            # Queued writes are numbered; flush() waits for a number, not an empty queue.
+            # Numbers can reach the queue out of order, so _written only advances
+            # past a number once every lower one is done too
+            self._queued = 0
+            self._written = 0
+            self._written_ahead = set()
+            self._queue_lock = threading.Lock()
+            self._written_condition = threading.Condition()
+            self._unreported_failures = []
+            self._writer = threading.Thread(target=self._write_behind, name='db-write-behind', daemon=True)
+            self._writer.start()
+            # Daemon threads die with the interpreter; drain the queue first
+            atexit.register(self.flush)
+    
+    @property
+    def patients(self):
+        self.flush()
+        return self.backend.all('patients')
+    
+    @property
+    def analyses(self):
+        self.flush()
+        return self.backend.all('analyses')
+    
+    @property
+    def recommendations(self):
+        self.flush()
+        return self.backend.all('recommendations')
+    
+    @property
+    def tumor_analyses(self):
+        self.flush()
+        return self.backend.all('tumor_analyses')
+    
+    def create_tables(self):
+        """Create backend tables if needed"""
+        self.backend.create_tables()
+    
     def get_session(self):
         """Return self as we don't need sessions"""
         return self
     
+    @contextmanager
+    def batch(self):
+        """Collect saves made inside the block and insert them together on exit"""
+        if getattr(self._batch, 'pending', None) is not None:
+            # Nested batch: the outer block writes
+            yield self
+            return
+        
+        self._batch.pending = {}
+        try:
+            yield self
+            pending = self._batch.pending
+        finally:
+            self._batch.pending = None
+        
+        if pending:
+            self.write(pending)
+    
+    @contextmanager
+    def locked_tables(self, tables):
+        """Hold the write locks of the given tables, always taken in name order"""
+        if len(tables) == 1:
+            # A single save: skip the ExitStack
+            with self._table_locks[next(iter(tables))]:
+                yield
+            return
+        
+        with ExitStack() as stack:
+            for table in sorted(tables):
+                stack.enter_context(self._table_locks[table])
+            yield
+    
+    def write(self, pending):
+        """Insert {table: records} now, or queue them for the write-behind thread"""
+        if self._queue is not None:
+            with self._queue_lock:
+                self._queued += 1
+                number = self._queued
+            # May block while the queue is full; other saves can still take numbers
+            self._queue.put((number, pending))
+            return
+        
+        self.insert_now(pending)
+    
+    def insert_now(self, pending):
+        """Insert {table: records} and count them once the insert has committed"""
+        changes = StatisticsCounters.changes(pending)
+        with self.locked_tables(pending):
+            self.backend.insert_batch(pending, changes)
+            with self._statistics_lock:
+                self.statistics.apply(changes)
+    
+    def _write_behind(self):
+        """Writer thread: drain whatever is queued and insert it as one batch"""
+        while True:
+            items = [self._queue.get()]
+            while len(items) < self.write_batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            failures = []
+            unstored = [pending for _, pending in items]
+            try:
+                try:
+                    batch = {}
+                    for pending in unstored:
+                        for table, records in pending.items():
+                            batch.setdefault(table, []).extend(records)
+                    self.insert_now(batch)
+                    unstored = []
+                except Exception:
+                    # One bad record rolls back the whole batch; store the saves one by one
+                    while unstored:
+                        try:
+                            self.insert_now(unstored[0])
+                        except Exception as e:
+                            failures.append((unstored[0], e))
+                        unstored.pop(0)
+            except BaseException as e:
+                # The writer is going down; report the saves it still held
+                failures.extend((pending, e) for pending in unstored)
+                raise
+            finally:
+                with self._written_condition:
+                    self.failed_writes.extend(failures)
+                    self._unreported_failures.extend(failures)
+                    self._written_ahead.update(number for number, _ in items)
+                    while self._written + 1 in self._written_ahead:
+                        self._written += 1
+                        self._written_ahead.remove(self._written)
+                    self._written_condition.notify_all()
+    
+    def flush(self, timeout=None):
+        """Wait until every write queued before this call has been attempted
+        
+        Raises WriteBehindError for queued records that could not be stored
+        since the last flush; they stay in failed_writes. Also raises it if
+        the writer thread has stopped, or if the writes are still pending
+        after timeout seconds (flush_timeout by default).
+        """
+        if self._queue is None:
+            return
+        
+        timeout = self.flush_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._queue_lock:
+            target = self._queued
+        with self._written_condition:
+            while self._written < target:
+                if not self._writer.is_alive():
+                    raise WriteBehindError([], f"write-behind thread stopped with {target - self._written} saves pending")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise WriteBehindError([], f"{target - self._written} queued saves still pending after {timeout}s")
+                # Wake up now and then to notice a writer that died without notifying
+                self._written_condition.wait(min(remaining, 1.0))
+            failures, self._unreported_failures = self._unreported_failures, []
+        if failures:
+            raise WriteBehindError(failures)
+    
+    def retry_failed_writes(self):
+        """Store the records in failed_writes synchronously; errors propagate"""
+        while self.failed_writes:
+            pending, _ = self.failed_writes[0]
+            self.insert_now(pending)
+            self.failed_writes.pop(0)
+    
+    def store(self, table, record):
+        """Assign the next id and hand the record to the backend (or the open batch)"""
+        if self._queue is not None:
+            # The writer cannot report back to the caller, so reject bad records now
+            self.backend.check(table, record)
+        
+        with self._id_lock:
+            record.id = next(self._ids)
+        
+        pending = getattr(self._batch, 'pending', None)
+        if pending is not None:
+            pending.setdefault(table, []).append(record)
+        else:
+            self.write({table: [record]})
+        return record.id
+    
     def save_patient_record(self, patient_data):
-        """Save patient record to memory"""
+        """Save patient record"""
         record = PatientRecord(
             patient_age=patient_data.get('age'),
             patient_gender=patient_data.get('gender'),
@@ -105,13 +863,10 @@ class DatabaseManager:
             duration=patient_data.get('duration'),
             medical_history=patient_data.get('medical_history')
         )
-        record.id = self._next_id
-        self._next_id += 1
-        self.patients.append(record)
-        return record.id
+        return self.store('patients', record)
     
     def save_medical_analysis(self, analysis_data, patient_record_id):
-        """Save medical analysis to memory"""
+        """Save medical analysis"""
         analysis = MedicalAnalysis(
             patient_record_id=patient_record_id,
             extracted_entities=analysis_data.get('entities'),
@@ -120,13 +875,10 @@ class DatabaseManager:
             duration_present=analysis_data.get('duration_present'),
             processed_text=analysis_data.get('processed_text')
         )
-        analysis.id = self._next_id
-        self._next_id += 1
-        self.analyses.append(analysis)
-        return analysis.id
+        return self.store('analyses', analysis)
     
     def save_mri_recommendation(self, recommendation_data, analysis_id):
-        """Save MRI recommendation to memory"""
+        """Save MRI recommendation"""
         recommendation = MRIRecommendation(
             analysis_id=analysis_id,
             recommendation_score=recommendation_data.get('recommendation_score'),
@@ -136,13 +888,10 @@ class DatabaseManager:
             urgent_indicators=recommendation_data.get('urgent_indicators'),
             red_flags_detected=recommendation_data.get('red_flags_detected')
         )
-        recommendation.id = self._next_id
-        self._next_id += 1
-        self.recommendations.append(recommendation)
-        return recommendation.id
+        return self.store('recommendations', recommendation)
     
     def save_tumor_analysis(self, tumor_data):
-        """Save tumor analysis to memory"""
+        """Save tumor analysis"""
         analysis = TumorAnalysis(
             image_filename=tumor_data.get('image_filename'),
             tumor_probability=tumor_data.get('tumor_probability'),
@@ -151,21 +900,93 @@ class DatabaseManager:
             quality_score=tumor_data.get('quality_score'),
             analysis_method=tumor_data.get('analysis_method', 'feature-based')
         )
-        analysis.id = self._next_id
-        self._next_id += 1
-        self.tumor_analyses.append(analysis)
-        return analysis.id
+        return self.store('tumor_analyses', analysis)
     
     def get_recent_analyses(self, limit=10):
-        """Get recent analyses from memory"""
-        return sorted(self.patients, key=lambda x: x.created_at, reverse=True)[:limit]
+        """Get the most recent patient records"""
+        self.flush()
+        return self.backend.page('patients', None, limit)
     
-    def get_analysis_statistics(self):
-        """Get analysis statistics from memory"""
-        return {
-            'total_patients': len(self.patients),
-            'total_analyses': len(self.analyses),
-            'total_mri_recommendations': len(self.recommendations),
-            'total_tumor_analyses': len(self.tumor_analyses),
-            'urgent_recommendations': sum(1 for r in self.recommendations if r.recommendation_score >= 0.7)
-        }
\ No newline at end of file
+    def get_analyses_page(self, after_id=None, limit=10):
+        """Page through patient records, newest first
+        
+        Returns (records, next_cursor): records are the newest `limit` with an
+        id below after_id (the newest overall when after_id is None), and
+        next_cursor is the after_id for the following page, or None on the
+        last page.
+        """
+        self.flush()
+        records = self.backend.page('patients', after_id, limit + 1)
+        if len(records) > limit:
+            return records[:limit], records[limit - 1].id
+        return records, None
+    
+    def get_analysis_statistics(self, days=30):
+        """Get analysis statistics from the running counters
+        
+        daily_counts covers the last `days` days, so the cost does not grow
+        with the age of the store.
+        """
+        self.flush()
+        with self._statistics_lock:
+            counters = self.statistics
+            return {
+                'total_patients': counters.counts['patients'],
+                'total_analyses': counters.counts['analyses'],
+                'total_mri_recommendations': counters.counts['recommendations'],
+                'total_tumor_analyses': counters.counts['tumor_analyses'],
+                'urgent_recommendations': counters.urgent_recommendations,
+                'score_histogram': list(counters.score_histogram),
+                'tumor_types': dict(counters.tumor_types),
+                'daily_counts': counters.recent_daily_counts(days)
+            }
+    
+    def rebuild_statistics(self):
+        """Recompute the counters from the stored records
+        
+        Returns the fields that had drifted, as {field: (counter value,
+        stored value)}; an empty dict means the counters were accurate.
+        """
+        self.flush()
+        with self.locked_tables(RECORD_TABLES):
+            rebuilt = self.backend.compute_statistics()
+            self.backend.save_statistics(rebuilt)
+            with self._statistics_lock:
+                differences = self.statistics.differences(rebuilt)
+                self.statistics = rebuilt
+        return differences
+    
+    def close(self):
+        """Write any queued records, then release the backend's resources"""
+        try:
+            self.flush()
+        finally:
+            self.backend.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the SQLite record store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    rebuild_parser = subparsers.add_parser(
+        'rebuild-stats', help="Reconcile the statistics counters against the stored records"
+    )
+    rebuild_parser.add_argument('--db', default=os.environ.get("BRAINWISE_DB_PATH"), help="SQLite file")
+    args = parser.parse_args(argv)
+    
+    if args.command == 'rebuild-stats':
+        if not args.db or not os.path.exists(args.db):
+            print("No database file; pass --db or set BRAINWISE_DB_PATH")
+            return 1
+        
+        db = DatabaseManager(SQLiteBackend(args.db))
+        differences = db.rebuild_statistics()
+        db.close()
+        
+        if not differences:
+            print("Statistics counters match the stored records")
+        for field, (counter_value, stored_value) in differences.items():
+            print(f"{field}: counters had {counter_value}, records give {stored_value}")
+    
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
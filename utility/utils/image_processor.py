@@ -2,6 +2,8 @@ import numpy as np
 import cv2
 from PIL import Image, ImageEnhance, ImageFilter
 import io
+import queue
+import threading
 
 class ImageProcessor:
     """Image processing utilities for medical images"""
@@ -9,43 +11,169 @@ class ImageProcessor:
     def __init__(self):
         self.target_size = (224, 224)
         self.supported_formats = ['PNG', 'JPEG', 'JPG', 'BMP', 'TIFF']
+        
+        # Filter kernels are built once and shared read-only across calls
+        self.edge_kernel = np.array([[-1,-1,-1], [-1,8,-1], [-1,-1,-1]])
+        self.morph_kernel = np.ones((3,3), np.uint8)
+        self.edge_kernel.flags.writeable = False
+        self.morph_kernel.flags.writeable = False
+        
+        self.clahe_clip_limit = 2.0
+        self.clahe_tile_grid = (8, 8)
+        
+        # CLAHE objects keep internal state, so each thread gets its own
+        self._thread_local = threading.local()
+    
+    def preprocessing_params(self):
+        """Parameters that determine preprocess_image output (used in cache keys)"""
+        return {
+            'target_size': self.target_size,
+            'clahe_clip_limit': self.clahe_clip_limit,
+            'clahe_tile_grid': self.clahe_tile_grid
+        }
+    
+    def get_clahe(self):
+        """Return this thread's reusable CLAHE object"""
+        clahe = getattr(self._thread_local, 'clahe', None)
+        if clahe is None:
+            clahe = cv2.createCLAHE(clipLimit=self.clahe_clip_limit, tileGridSize=self.clahe_tile_grid)
+            self._thread_local.clahe = clahe
+        return clahe
     
-    def preprocess_image(self, image):
-        """Preprocess uploaded image for model input"""
+    def preprocess_image(self, image, as_float=False):
+        """Preprocess uploaded image for model input
+        
+        Works in uint8 from decode to enhancement and returns a target-size
+        uint8 RGB array. Pass as_float=True for a float32 array in [0, 1].
+        """
         try:
             # Convert PIL Image to numpy array
             if isinstance(image, Image.Image):
-                image_array = np.array(image)
+                if image.mode not in ('L', 'RGB', 'RGBA'):
+                    image = image.convert('RGB')
+                image_array = np.asarray(image)
             else:
-                image_array = image
+                image_array = self.to_uint8(image)
             
-            # Convert to RGB if necessary
-            if len(image_array.shape) == 3 and image_array.shape[2] == 4:
-                # Remove alpha channel if present
-                image_array = image_array[:, :, :3]
-            elif len(image_array.shape) == 2:
-                # Convert grayscale to RGB
-                image_array = cv2.cvtColor(image_array, cv2.COLOR_GRAY2RGB)
-            
-            # Resize to target size
+            # Resize first so channel conversions only touch target-size pixels
             processed_image = cv2.resize(image_array, self.target_size)
             
-            # Normalize pixel values
-            processed_image = processed_image.astype(np.float32) / 255.0
+            if len(processed_image.shape) == 3 and processed_image.shape[2] == 4:
+                # Remove alpha channel if present
+                processed_image = cv2.cvtColor(processed_image, cv2.COLOR_RGBA2RGB)
             
-            # Apply medical image enhancements
-            enhanced_image = self.enhance_medical_image(processed_image)
+            # Apply medical image enhancements (always returns RGB)
+            enhanced_image = self.enhance_medical_image(processed_image, out=processed_image)
+            
+            if as_float:
+                return self.to_float(enhanced_image)
             
             return enhanced_image
             
         except Exception as e:
             raise Exception(f"Error preprocessing image: {str(e)}")
     
-    def enhance_medical_image(self, image_array):
-        """Apply medical image specific enhancements"""
+    def to_uint8(self, image_array):
+        """Return a uint8 view of an image, scaling [0, 1] floats to [0, 255]"""
+        if image_array.dtype == np.uint8:
+            return image_array
+        if np.issubdtype(image_array.dtype, np.floating):
+            return cv2.convertScaleAbs(image_array, alpha=255.0)
+        return image_array.astype(np.uint8)
+    
+    def to_float(self, image_array):
+        """Return a float32 copy of a uint8 image scaled to [0, 1]"""
+        if np.issubdtype(image_array.dtype, np.floating):
+            return image_array
+        return np.multiply(image_array, 1.0 / 255.0, dtype=np.float32)
+    
+    def load_image(self, source):
+        """Decode an image file straight to a target-size uint8 RGB array
+        
+        The decoder is asked to downsample while reading (JPEG DCT scaling via
+        draft(), integer reduce() for other formats), so a large scan never
+        exists in memory at full resolution.
+        """
+        target_width, target_height = self.target_size
+        
+        with Image.open(source) as image:
+            # JPEG decoders can skip detail below the requested size
+            image.draft('RGB', self.target_size)
+            
+            if image.mode not in ('L', 'RGB', 'RGBA'):
+                image = image.convert('RGB')
+            
+            # Integer box reduction that keeps the image at least target size
+            factor = min(image.width // target_width, image.height // target_height)
+            if factor > 1:
+                image = image.reduce(factor)
+            
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            
+            image_array = np.asarray(image)
+        
+        if image_array.shape[1::-1] != self.target_size:
+            image_array = cv2.resize(image_array, self.target_size)
+        
+        return image_array
+    
+    def iter_images(self, sources, prefetch=8):
+        """Yield (source, image_array, error) for each source in order
+        
+        Decoding runs in a background thread at most `prefetch` images ahead
+        of the consumer, so memory stays bounded regardless of how many
+        sources are streamed. image_array is a target-size uint8 RGB array, or
+        None when decoding failed and error holds the message.
+        """
+        decoded = queue.Queue(maxsize=max(1, prefetch))
+        stop = threading.Event()
+        done = object()
+        
+        def put(item):
+            # Give up if the consumer has gone away
+            while not stop.is_set():
+                try:
+                    decoded.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def decode_all():
+            try:
+                for source in sources:
+                    try:
+                        item = (source, self.load_image(source), None)
+                    except Exception as e:
+                        item = (source, None, str(e))
+                    if not put(item):
+                        return
+            finally:
+                put(done)
+        
+        worker = threading.Thread(target=decode_all, daemon=True)
+        worker.start()
+        
         try:
-            # Convert back to uint8 for OpenCV operations
-            uint8_image = (image_array * 255).astype(np.uint8)
+            while True:
+                item = decoded.get()
+                if item is done:
+                    break
+                yield item
+        finally:
+            stop.set()
+            worker.join()
+    
+    def enhance_medical_image(self, image_array, out=None):
+        """Apply medical image specific enhancements
+        
+        uint8 input is enhanced in place of `out` (when given) and returned as
+        uint8 RGB; float input in [0, 1] is returned as float32 as before.
+        """
+        try:
+            is_float = np.issubdtype(image_array.dtype, np.floating)
+            uint8_image = self.to_uint8(image_array)
             
             # Convert to grayscale for processing
             if len(uint8_image.shape) == 3:
@@ -54,19 +182,22 @@ class ImageProcessor:
                 gray = uint8_image
             
             # Apply CLAHE (Contrast Limited Adaptive Histogram Equalization)
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-            enhanced_gray = clahe.apply(gray)
+            enhanced_gray = self.get_clahe().apply(gray)
             
-            # Convert back to RGB
-            if len(image_array.shape) == 3:
-                enhanced_rgb = cv2.cvtColor(enhanced_gray, cv2.COLOR_GRAY2RGB)
-            else:
-                enhanced_rgb = enhanced_gray
+            if is_float and len(image_array.shape) != 3:
+                # Float grayscale input stays single-channel
+                return self.to_float(enhanced_gray)
             
-            # Normalize back to 0-1 range
-            enhanced_image = enhanced_rgb.astype(np.float32) / 255.0
+            # Convert back to RGB, reusing the caller's buffer when it fits
+            if out is not None and (out.dtype != np.uint8 or out.shape != enhanced_gray.shape + (3,)):
+                out = None
+            enhanced_rgb = cv2.cvtColor(enhanced_gray, cv2.COLOR_GRAY2RGB, dst=out)
             
-            return enhanced_image
+            if is_float:
+                # Normalize back to 0-1 range
+                return self.to_float(enhanced_rgb)
+            
+            return enhanced_rgb
             
         except Exception as e:
             # Return original image if enhancement fails
@@ -135,10 +266,11 @@ class ImageProcessor:
         
         try:
             # Convert to grayscale if needed
-            if len(image_array.shape) == 3:
-                gray = cv2.cvtColor((image_array * 255).astype(np.uint8), cv2.COLOR_RGB2GRAY)
+            uint8_image = self.to_uint8(image_array)
+            if len(uint8_image.shape) == 3:
+                gray = cv2.cvtColor(uint8_image, cv2.COLOR_RGB2GRAY)
             else:
-                gray = (image_array * 255).astype(np.uint8)
+                gray = uint8_image
             
             # Blur detection using Laplacian variance
             laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
@@ -176,7 +308,7 @@ class ImageProcessor:
         """Apply medical imaging specific filters"""
         try:
             # Convert to uint8 for OpenCV operations
-            uint8_image = (image_array * 255).astype(np.uint8)
+            uint8_image = self.to_uint8(image_array)
             
             if len(uint8_image.shape) == 3:
                 gray = cv2.cvtColor(uint8_image, cv2.COLOR_RGB2GRAY)
@@ -187,8 +319,7 @@ class ImageProcessor:
             filters = {}
             
             # Edge enhancement
-            kernel_edge = np.array([[-1,-1,-1], [-1,8,-1], [-1,-1,-1]])
-            edge_enhanced = cv2.filter2D(gray, -1, kernel_edge)
+            edge_enhanced = cv2.filter2D(gray, -1, self.edge_kernel)
             filters['edge_enhanced'] = edge_enhanced
             
             # Gaussian blur for noise reduction
@@ -200,9 +331,8 @@ class ImageProcessor:
             filters['median_filter'] = median_filter
             
             # Morphological operations
-            kernel = np.ones((3,3), np.uint8)
-            opening = cv2.morphologyEx(gray, cv2.MORPH_OPEN, kernel)
-            closing = cv2.morphologyEx(gray, cv2.MORPH_CLOSE, kernel)
+            opening = cv2.morphologyEx(gray, cv2.MORPH_OPEN, self.morph_kernel)
+            closing = cv2.morphologyEx(gray, cv2.MORPH_CLOSE, self.morph_kernel)
             filters['opening'] = opening
             filters['closing'] = closing
             
@@ -221,9 +351,9 @@ class ImageProcessor:
             else:
                 # Convert numpy array to PIL Image
                 if len(image.shape) == 3:
-                    pil_image = Image.fromarray((image * 255).astype(np.uint8))
+                    pil_image = Image.fromarray(self.to_uint8(image))
                 else:
-                    pil_image = Image.fromarray((image * 255).astype(np.uint8), mode='L')
+                    pil_image = Image.fromarray(self.to_uint8(image), mode='L')
                 
                 thumbnail = pil_image.copy()
                 thumbnail.thumbnail(size, Image.Resampling.LANCZOS)
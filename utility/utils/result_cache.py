@@ -0,0 +1,117 @@
+"""
+Content-addressed cache for analysis results
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+class ResultCache:
+    """Two-tier result cache keyed by a hash of the raw input and its parameters
+
+    Results live in a bounded in-memory LRU tier and, when a path is given, in
+    an SQLite file that survives restarts. Values must be JSON-serializable.
+    """
+
+    def __init__(self, db_path=None, max_memory_items=256):
+        self.db_path = db_path
+        self.max_memory_items = max_memory_items
+        self.memory = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = None
+
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(db_path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._connection.commit()
+
+    @staticmethod
+    def make_key(data, **params):
+        """Hash raw input bytes together with the parameters that shaped the result"""
+        digest = hashlib.sha256(data)
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached value for key, or None"""
+        with self._lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return self.memory[key]
+
+            if self._connection is not None:
+                row = self._connection.execute(
+                    "SELECT value FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Store a value in both tiers"""
+        with self._lock:
+            self._remember(key, value)
+            if self._connection is not None:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)",
+                    (key, json.dumps(value))
+                )
+                self._connection.commit()
+
+    def get_or_compute(self, key, compute, cache_if=None):
+        """Return the cached value for key, computing and storing it on a miss
+
+        cache_if, when given, decides whether a freshly computed value is kept
+        (e.g. to avoid caching error results).
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        value = compute()
+        if cache_if is None or cache_if(value):
+            self.put(key, value)
+        return value
+
+    def _remember(self, key, value):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_items:
+            self.memory.popitem(last=False)
+
+    def stats(self):
+        """Hit/miss counters for both tiers"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'memory_items': len(self.memory)
+            }
+
+    def clear(self):
+        """Drop every cached value from both tiers"""
+        with self._lock:
+            self.memory.clear()
+            if self._connection is not None:
+                self._connection.execute("DELETE FROM results")
+                self._connection.commit()
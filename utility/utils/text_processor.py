@@ -1,5 +1,8 @@
+import argparse
+import os
 import re
 import string
+import time
 import unicodedata
 from collections import Counter
 import nltk
@@ -7,29 +10,89 @@ from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize, sent_tokenize
 from nltk.stem import PorterStemmer, WordNetLemmatizer
 
+from utility.utils.abbreviations import AbbreviationIndex, get_abbreviation_index
+from utility.utils.data.medical_entities import MEDICAL_ABBREVIATIONS
+
+# Project-local NLTK resource bundle, filled once by `prepare`
+NLTK_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'nltk_data'
+)
+
+# NLTK package id -> resource path inside an nltk_data directory
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet'
+}
+
+def prepare_nltk_bundle(target_dir=NLTK_DATA_DIR):
+    """Download the NLTK resources TextProcessor needs into target_dir"""
+    os.makedirs(target_dir, exist_ok=True)
+    missing = []
+    
+    for package in NLTK_RESOURCES:
+        if not nltk.download(package, download_dir=target_dir, quiet=True):
+            missing.append(package)
+    
+    return missing
+
+def missing_nltk_resources(data_dir):
+    """NLTK packages whose resources cannot be found in data_dir"""
+    missing = []
+    
+    for package, resource in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(resource, paths=[data_dir])
+        except LookupError:
+            missing.append(package)
+    
+    return missing
+
 class TextProcessor:
     """Text processing utilities for medical text analysis"""
     
-    def __init__(self):
+    def __init__(self, nltk_data_dir=NLTK_DATA_DIR):
         self.stemmer = PorterStemmer()
         self.lemmatizer = WordNetLemmatizer()
         self.stop_words = set()
         self.medical_abbreviations = {}
+        self.nltk_data_dir = nltk_data_dir
+        self.nltk_data_source = None
+        self.nltk_setup_seconds = 0.0
         self.setup_nltk_data()
         self.setup_medical_vocabulary()
+        self.compile_cleaning_patterns()
     
     def setup_nltk_data(self):
-        """Setup NLTK data with error handling"""
+        """Setup NLTK data with error handling
+        
+        When the local bundle holds every resource, they are read from it and
+        nothing is downloaded; when it is absent, empty or partial, the
+        packages are fetched as before. The time taken and the source used
+        are kept in nltk_setup_seconds and nltk_data_source.
+        """
+        start_time = time.perf_counter()
+        
         try:
-            # Download required NLTK data
-            nltk.download('punkt', quiet=True)
-            nltk.download('stopwords', quiet=True)
-            nltk.download('wordnet', quiet=True)
+            if self.nltk_data_dir and not missing_nltk_resources(self.nltk_data_dir):
+                # Offline: pure file load from the prepared bundle
+                if self.nltk_data_dir not in nltk.data.path:
+                    nltk.data.path.insert(0, self.nltk_data_dir)
+                self.nltk_data_source = 'bundle'
+            else:
+                # Download required NLTK data
+                nltk.download('punkt', quiet=True)
+                nltk.download('stopwords', quiet=True)
+                nltk.download('wordnet', quiet=True)
+                self.nltk_data_source = 'download'
             
             # Load stopwords
             self.stop_words = set(stopwords.words('english'))
             
         except Exception as e:
+            self.nltk_data_source = 'fallback'
             # Fallback to basic stopwords if NLTK fails
             self.stop_words = {
                 'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
@@ -38,43 +101,15 @@ class TextProcessor:
                 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does',
                 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can'
             }
+        
+        self.nltk_setup_seconds = time.perf_counter() - start_time
     
     def setup_medical_vocabulary(self):
         """Setup medical abbreviations and terminology"""
-        self.medical_abbreviations = {
-            'mri': 'magnetic resonance imaging',
-            'ct': 'computed tomography',
-            'bp': 'blood pressure',
-            'hr': 'heart rate',
-            'temp': 'temperature',
-            'resp': 'respiratory',
-            'o2': 'oxygen',
-            'co2': 'carbon dioxide',
-            'hx': 'history',
-            'sx': 'symptoms',
-            'dx': 'diagnosis',
-            'tx': 'treatment',
-            'rx': 'prescription',
-            'pt': 'patient',
-            'pts': 'patients',
-            'yo': 'year old',
-            'yrs': 'years',
-            'mos': 'months',
-            'wks': 'weeks',
-            'q': 'every',
-            'bid': 'twice daily',
-            'tid': 'three times daily',
-            'qid': 'four times daily',
-            'prn': 'as needed',
-            'npo': 'nothing by mouth',
-            'sob': 'shortness of breath',
-            'loc': 'loss of consciousness',
-            'n/v': 'nausea and vomiting',
-            'ha': 'headache',
-            'c/o': 'complains of',
-            'w/': 'with',
-            'w/o': 'without'
-        }
+        # Shared abbreviation table; edits to this dict are picked up by abbreviation_index
+        self.medical_abbreviations = dict(MEDICAL_ABBREVIATIONS)
+        self._indexed_abbreviations = None
+        self._abbreviation_index = None
         
         # Medical terms that should not be considered stopwords
         self.medical_stopwords_exceptions = {
@@ -82,6 +117,21 @@ class TextProcessor:
             'severe', 'mild', 'moderate', 'chronic', 'acute', 'sudden', 'gradual'
         }
     
+    def compile_cleaning_patterns(self):
+        """Compile the clean_text regexes once, fusing passes where the result is unchanged"""
+        # Special characters and whitespace both collapse to a single space
+        self.special_char_pattern = re.compile(r'[^\w\-\./,;:\(\)]+')
+        
+        # The leading lookahead lets the scanner skip positions that cannot start a match
+        self.punctuation_pattern = re.compile(r'(?=[\s,.;:!?])\s*([,.;:!?])\s*')
+        self.open_paren_pattern = re.compile(r'\s*\(\s*')
+        self.close_paren_pattern = re.compile(r'\s*\)\s*')
+        
+        # Only the whitespace between a number and its unit is removed
+        self.measurement_pattern = re.compile(r'(?<=\d)\s+(?=mg|ml|cc|kg|lb|cm|mm|in)')
+        self.date_pattern = re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](\d{2,4})')
+        self.time_pattern = re.compile(r'(\d{1,2}):(\d{2})\s*(am|pm)', re.IGNORECASE)
+    
     def clean_text(self, text):
         """Clean and preprocess medical text"""
         if not text:
@@ -106,57 +156,67 @@ class TextProcessor:
             # Return original text if cleaning fails
             return text
     
+    def clean_texts(self, texts):
+        """Clean an iterable of texts lazily, yielding one cleaned text per input"""
+        clean_text = self.clean_text
+        for text in texts:
+            yield clean_text(text)
+    
     def basic_cleaning(self, text):
         """Perform basic text cleaning"""
-        # Remove or replace special characters while preserving medical notation
-        text = re.sub(r'[^\w\s\-\./,;:\(\)]', ' ', text)
-        
-        # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text)
+        # Replace special characters while preserving medical notation, and
+        # normalize whitespace in the same pass
+        text = self.special_char_pattern.sub(' ', text)
         
         # Strip leading/trailing whitespace
         text = text.strip()
         
         return text
     
-    def expand_abbreviations(self, text):
-        """Expand medical abbreviations"""
-        words = text.split()
-        expanded_words = []
-        
-        for word in words:
-            word_lower = word.lower().rstrip('.,;:')
-            if word_lower in self.medical_abbreviations:
-                expanded_words.append(self.medical_abbreviations[word_lower])
-            else:
-                expanded_words.append(word)
+    @property
+    def abbreviation_index(self):
+        """Index over medical_abbreviations, rebuilt after the dict is edited
         
-        return ' '.join(expanded_words)
+        The unedited table is served by the process-wide shared index.
+        """
+        if self._abbreviation_index is None or self.medical_abbreviations != self._indexed_abbreviations:
+            self._indexed_abbreviations = dict(self.medical_abbreviations)
+            if self._indexed_abbreviations == MEDICAL_ABBREVIATIONS:
+                self._abbreviation_index = get_abbreviation_index()
+            else:
+                self._abbreviation_index = AbbreviationIndex(self._indexed_abbreviations)
+        return self._abbreviation_index
+    
+    def expand_abbreviations(self, text):
+        """Expand medical abbreviations, including multi-word and punctuated forms"""
+        return self.abbreviation_index.expand(text)
     
     def normalize_spacing(self, text):
         """Normalize spacing and punctuation"""
         # Fix spacing around punctuation
-        text = re.sub(r'\s*([,.;:!?])\s*', r'\1 ', text)
-        
-        # Fix spacing around parentheses
-        text = re.sub(r'\s*\(\s*', ' (', text)
-        text = re.sub(r'\s*\)\s*', ') ', text)
+        text = self.punctuation_pattern.sub(r'\1 ', text)
         
-        # Remove extra spaces
-        text = re.sub(r'\s+', ' ', text)
+        # Fix spacing around parentheses (skipped when there are none)
+        if '(' in text:
+            text = self.open_paren_pattern.sub(' (', text)
+        if ')' in text:
+            text = self.close_paren_pattern.sub(') ', text)
         
-        return text.strip()
+        # Remove extra spaces and strip in one pass
+        return ' '.join(text.split())
     
     def handle_medical_formatting(self, text):
         """Handle medical-specific formatting"""
         # Normalize medical measurements and units
-        text = re.sub(r'(\d+)\s*(mg|ml|cc|kg|lb|cm|mm|inch|in)', r'\1\2', text)
+        text = self.measurement_pattern.sub('', text)
         
         # Normalize date formats
-        text = re.sub(r'(\d{1,2})[/-](\d{1,2})[/-](\d{2,4})', r'\1/\2/\3', text)
+        if '/' in text or '-' in text:
+            text = self.date_pattern.sub(r'\1/\2/\3', text)
         
         # Normalize time formats
-        text = re.sub(r'(\d{1,2}):(\d{2})\s*(am|pm)', r'\1:\2\3', text, flags=re.IGNORECASE)
+        if ':' in text:
+            text = self.time_pattern.sub(r'\1:\2\3', text)
         
         return text
     
@@ -357,3 +417,26 @@ class TextProcessor:
             })
         
         return measurements
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the offline NLTK resource bundle")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    prepare_parser = subparsers.add_parser('prepare', help="Download NLTK resources into the bundle directory")
+    prepare_parser.add_argument('--dir', default=NLTK_DATA_DIR, help="Bundle directory")
+    args = parser.parse_args(argv)
+    
+    if args.command == 'prepare':
+        start_time = time.perf_counter()
+        missing = prepare_nltk_bundle(args.dir)
+        if missing:
+            print(f"Failed to fetch: {', '.join(missing)}")
+            return 1
+        print(f"NLTK bundle ready in {args.dir} ({time.perf_counter() - start_time:.1f}s)")
+        
+        processor = TextProcessor(nltk_data_dir=args.dir)
+        print(f"TextProcessor startup: NLTK setup from {processor.nltk_data_source} took {processor.nltk_setup_seconds * 1000:.1f} ms")
+    
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())